@@ -0,0 +1,55 @@
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models.scenario_build import ScenarioBuilder, ScenarioVariant
+
+
+class Command(BaseCommand):
+    help = "Construit les réseaux (netconvert) des variantes du carrefour, avec cache par empreinte du contenu"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", default=settings.SCENARIO_NODES_FILE, help="fichier de noeuds (.nod.xml)")
+        parser.add_argument("--edges", default=settings.SCENARIO_EDGES_FILE, help="fichier d'edges (.edg.xml)")
+        parser.add_argument("--types", help="fichier de types (.typ.xml)")
+        parser.add_argument("--connections", help="fichier de connexions (.con.xml)")
+        parser.add_argument("--cache-dir", default=settings.SCENARIO_CACHE_DIR, help="dossier du cache")
+        parser.add_argument("--netconvert", default=settings.NETCONVERT_BINARY, help="binaire netconvert")
+        parser.add_argument("--lanes", type=int, nargs="+", default=[None], help="nombres de voies par edge")
+        parser.add_argument("--length", type=float, nargs="+", default=[None],
+                            help="longueurs d'approche (m)")
+        parser.add_argument("--tls", nargs="+", default=[None],
+                            choices=["static", "actuated", "delay_based"], help="types de feu")
+        parser.add_argument("--jobs", type=int, help="constructions en parallèle (défaut : nombre de coeurs)")
+
+    def handle(self, *args, **options):
+        builder = ScenarioBuilder(
+            options["nodes"],
+            options["edges"],
+            options["cache_dir"],
+            types=options["types"],
+            connections=options["connections"],
+            netconvert=options["netconvert"],
+        )
+        variants = ScenarioVariant.grid(options["lanes"], options["length"], options["tls"])
+
+        start = time.perf_counter()
+        try:
+            results = builder.build_all(variants, jobs=options["jobs"])
+        except FileNotFoundError:
+            raise CommandError(f"netconvert introuvable : {options['netconvert']}")
+        except subprocess.CalledProcessError as e:
+            raise CommandError(f"netconvert a échoué :\n{e.stderr}")
+        elapsed = time.perf_counter() - start
+
+        built = 0
+        for variant, path, cached in results:
+            built += not cached
+            status = "cache" if cached else "construit"
+            self.stdout.write(f"{variant.name:<24} {status:<10} {path}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} variantes ({built} construites, {len(results) - built} en cache) en {elapsed:.1f} s"
+        ))
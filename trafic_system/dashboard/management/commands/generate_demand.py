@@ -0,0 +1,51 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models.demand import DemandGenerator
+from dashboard.models.routes import RouteCatalogue
+
+
+class Command(BaseCommand):
+    help = "Génère un fichier de routes (demande de trafic) en flux à partir de la topologie du réseau"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="fichier .rou.xml à écrire")
+        parser.add_argument("--config", default=settings.CONFIG_FILE_SIMULATION,
+                            help="fichier .sumocfg du scénario")
+        parser.add_argument("--od-file",
+                            help='matrice origine-destination JSON {"N": {"S": 400}} en véhicules/heure')
+        parser.add_argument("--rate", type=float, default=300.0,
+                            help="débit (véhicules/heure) de chaque route si aucune matrice n'est donnée")
+        parser.add_argument("--profile", action="append", default=[],
+                            help="période début:fin:facteur (répétable), par défaut 0:3600:1")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        catalogue = RouteCatalogue.from_config(options["config"])
+        generator = DemandGenerator(catalogue, seed=options["seed"])
+
+        if options["od_file"]:
+            with open(options["od_file"], encoding="utf-8") as f:
+                od_matrix = json.load(f)
+            try:
+                rates = generator.rates_from_od_matrix(od_matrix)
+            except ValueError as e:
+                raise CommandError(str(e))
+        else:
+            rates = {route_id: options["rate"] for route_id in catalogue.ids()}
+
+        profile = []
+        for period in options["profile"] or ["0:3600:1"]:
+            try:
+                begin, end, factor = (float(v) for v in period.split(":"))
+            except ValueError:
+                raise CommandError(f"Période invalide : {period} (attendu début:fin:facteur)")
+            profile.append((begin, end, factor))
+
+        try:
+            count = generator.write(options["output"], rates, profile)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"{count} véhicules écrits dans {options['output']}"))
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.models.detectors import DISCARD_OUTPUT, write_detectors_file
+from dashboard.models.network import load_network, net_file_from_config
+
+
+class Command(BaseCommand):
+    help = "Génère les détecteurs E2/E1 des lanes entrantes dans le fichier additionnel du scénario"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", default=settings.CONFIG_FILE_SIMULATION,
+                            help="fichier .sumocfg du scénario")
+        parser.add_argument("--output", help="fichier à écrire (par défaut detectors.add.xml à côté du .sumocfg)")
+        parser.add_argument("--period", type=int, default=60, help="période d'agrégation des détecteurs (s)")
+        parser.add_argument("--detector-output", default=DISCARD_OUTPUT,
+                            help="sortie XML des détecteurs (par défaut NUL : aucune, mesures lues par TraCI)")
+
+    def handle(self, *args, **options):
+        network = load_network(net_file_from_config(options["config"]))
+        output = options["output"] or Path(options["config"]).resolve().parent / "detectors.add.xml"
+
+        lanes = write_detectors_file(network, output, period=options["period"],
+                                     output_file=options["detector_output"])
+        self.stdout.write(self.style.SUCCESS(f"{len(lanes)} lanes équipées dans {output}"))
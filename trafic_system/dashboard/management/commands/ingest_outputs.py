@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models.routes import RouteCatalogue
+from dashboard.models.sumo_outputs import OUTPUTS, OutputIngestor
+
+
+class Command(BaseCommand):
+    help = "Agrège en flux les sorties SUMO (tripinfo, summary, queue, fcd) d'un dossier de simulation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir", help="dossier contenant les sorties SUMO")
+        parser.add_argument("--config", default=settings.CONFIG_FILE_SIMULATION,
+                            help="fichier .sumocfg du scénario (réseau et routes)")
+        parser.add_argument("--follow", action="store_true",
+                            help="suivre les fichiers pendant que la simulation tourne")
+        parser.add_argument("--timeout", type=float,
+                            help="avec --follow, arrêter le suivi après ce nombre de secondes")
+
+    def handle(self, *args, **options):
+        output_dir = Path(options["output_dir"])
+        catalogue = RouteCatalogue.from_config(options["config"])
+        ingestor = OutputIngestor(catalogue.network, catalogue)
+
+        if options["follow"]:
+            kinds = list(OUTPUTS)
+        else:
+            kinds = [kind for kind, (_, filename) in OUTPUTS.items() if (output_dir / filename).exists()]
+        if not kinds:
+            raise CommandError(f"Aucune sortie SUMO dans {output_dir}")
+
+        # Un fil par fichier : chaque type de sortie alimente ses propres statistiques.
+        # Fils démons arrêtés par `stop` (Ctrl-C ou --timeout) : un fichier qui
+        # n'apparaît jamais ne bloque pas la commande
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=ingestor.ingest,
+                args=(kind, output_dir / OUTPUTS[kind][1], options["follow"], stop.is_set),
+                daemon=True,
+            )
+            for kind in kinds
+        ]
+        for t in threads:
+            t.start()
+
+        deadline = time.monotonic() + options["timeout"] if options["timeout"] else None
+        try:
+            while any(t.is_alive() for t in threads):
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                for t in threads:
+                    t.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stderr.write("Interrompu : statistiques partielles")
+        finally:
+            stop.set()
+            for t in threads:
+                t.join(timeout=2)
+
+        self.stdout.write(json.dumps(ingestor.snapshot(), indent=2))
@@ -0,0 +1,196 @@
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Commandes envoyées par le dashboard Angular (SimulationService)
+CONTROL_COMMANDS = [
+    "traffic_light/stop_all",
+    "traffic_light/restore_controle",
+    "traffic_light/prioritize_direction/NS/",
+    "traffic_light/prioritize_direction/EW/",
+    "traffic_light/prioritize/1/",
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class LoadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, endpoint, latency, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, duration):
+        report = {}
+        all_latencies = []
+        total_errors = 0
+
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            errors = self.errors.get(endpoint, 0)
+            all_latencies.extend(values)
+            total_errors += errors
+            report[endpoint] = self._line(values, errors, duration)
+
+        report["total"] = self._line(sorted(all_latencies), total_errors, duration)
+        return report
+
+    def _line(self, values, errors, duration):
+        return {
+            "requests": len(values),
+            "throughput_rps": round(len(values) / duration, 2) if duration else None,
+            "error_rate": round(errors / len(values), 4) if values else 0,
+            "p50_ms": _ms(percentile(values, 50)),
+            "p95_ms": _ms(percentile(values, 95)),
+            "p99_ms": _ms(percentile(values, 99)),
+        }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+class Command(BaseCommand):
+    help = ("Test de charge de l'API dashboard : simule N clients Angular "
+            "(poll /data toutes les secondes + commandes) et mesure les latences")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="URL du dashboard déjà lancé (ex: http://127.0.0.1:8000/dashboard). "
+                                          "Sans --url, un serveur de dev sans interface SUMO est démarré.")
+        parser.add_argument("--clients", type=int, default=10)
+        parser.add_argument("--duration", type=float, default=30.0, help="durée du test en secondes")
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--commands-per-minute", type=float, default=2.0,
+                            help="commandes de contrôle envoyées par client et par minute")
+        parser.add_argument("--timeout", type=float, default=10.0)
+        parser.add_argument("--json", action="store_true", help="rapport au format JSON")
+
+    def handle(self, *args, **options):
+        server = None
+        base_url = options["url"]
+
+        if base_url is None:
+            server, base_url = self._start_server(options["duration"])
+
+        try:
+            self._wait_ready(base_url, options["timeout"] * 3)
+
+            # Même séquence que le dashboard : topologie statique, puis démarrage
+            self._request(base_url, "", options["timeout"])
+            self._request(base_url, "start/", options["timeout"])
+
+            stats = LoadStats()
+            deadline = time.monotonic() + options["duration"]
+            threads = [
+                threading.Thread(target=self._client, args=(base_url, stats, deadline, options), daemon=True)
+                for _ in range(options["clients"])
+            ]
+            started = time.monotonic()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.monotonic() - started
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        report = stats.summary(elapsed)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{options['clients']} clients, {elapsed:.1f} s")
+        self.stdout.write(f"{'endpoint':45} {'req':>7} {'req/s':>8} {'err':>7} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for endpoint, line in report.items():
+            self.stdout.write(
+                f"{endpoint:45} {line['requests']:>7} {line['throughput_rps']:>8} "
+                f"{line['error_rate']:>7.2%} {line['p50_ms']!s:>8} {line['p95_ms']!s:>8} {line['p99_ms']!s:>8}"
+            )
+
+    def _client(self, base_url, stats, deadline, options):
+        rng = random.Random()
+        command_probability = options["commands_per_minute"] * options["poll_interval"] / 60.0
+
+        # Décalage initial : les clients ne pollent pas tous à la même milliseconde
+        next_poll = time.monotonic() + rng.uniform(0, options["poll_interval"])
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return
+            if now < next_poll:
+                time.sleep(min(next_poll, deadline) - now)
+                continue
+            next_poll += options["poll_interval"]
+
+            self._timed(base_url, "data/", stats, options["timeout"])
+            if rng.random() < command_probability:
+                self._timed(base_url, rng.choice(CONTROL_COMMANDS), stats, options["timeout"])
+
+    def _timed(self, base_url, endpoint, stats, timeout):
+        started = time.perf_counter()
+        try:
+            status = self._request(base_url, endpoint, timeout)
+            ok = status < 400
+        except (urllib.error.URLError, OSError):
+            ok = False
+        stats.add(endpoint, time.perf_counter() - started, ok)
+
+    def _request(self, base_url, endpoint, timeout):
+        try:
+            with urllib.request.urlopen(f"{base_url.rstrip('/')}/{endpoint}", timeout=timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def _start_server(self, duration):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+
+        env = dict(os.environ)
+        env["SUMO_BINARY"] = "sumo"
+        # Le scénario doit durer au moins le temps du test (0.1 s réelle par pas)
+        env.setdefault("SUMO_EXTRA_ARGS", f"--end {int(duration * 10) + 600}")
+
+        manage = Path(__file__).resolve().parents[3] / "manage.py"
+        server = subprocess.Popen(
+            [sys.executable, str(manage), "runserver", f"127.0.0.1:{port}", "--noreload"],
+            cwd=manage.parent, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        return server, f"http://127.0.0.1:{port}/dashboard"
+
+    def _wait_ready(self, base_url, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                self._request(base_url, "data/", 1.0)
+                return
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        raise CommandError(f"Serveur injoignable : {base_url}")
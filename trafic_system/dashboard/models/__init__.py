@@ -1,3 +1,5 @@
 from .carrefour import Carrefour
+from .replay import Replay
+from .routes import RouteCatalogue
 from .simulation import Simulation
 from .vehicle import Vehicle
\ No newline at end of file
@@ -1,5 +1,6 @@
 import traci
 from .traffic_light import TrafficLight
+from .vehicle_registry import VehicleRegistry
 
 class Carrefour:
     """
@@ -8,7 +9,9 @@ class Carrefour:
     """
 
     def __init__(self, tl_id=None):
-        self.TL = TrafficLight()
+        # handles entiers des véhicules présents (au lieu des ids par lane)
+        self.vehicles = VehicleRegistry()
+        self.TL = TrafficLight(self.vehicles)
 
         self.edges = traci.edge.getIDList()
         self.lanes = traci.lane.getIDList()
@@ -25,6 +28,9 @@ class Carrefour:
         # Mappage edge -> lanes
         self.edge_lanes = {edge: [lane for lane in self.lanes if lane.startswith(edge)] for edge in self.edges}
 
+        # lane -> attributs fixes (edge, longueur, vitesse max), lus une seule fois
+        self._lane_static = {}
+
 
 
 
@@ -46,21 +52,43 @@ class Carrefour:
 
 
 
-    def get_lane_info(self, lane_id):
+    def get_lane_info(self, lane_id, measures=None):
         """
         Infos utiles pour générer le traffic sur la lane
-        """
-        return {
-            "id": lane_id,
-            "edge_id": traci.lane.getEdgeID(lane_id),
-            "length": traci.lane.getLength(lane_id),
-            "max_speed": traci.lane.getMaxSpeed(lane_id),
-            "num_vehicles": traci.lane.getLastStepVehicleNumber(lane_id),
-            "vehicle_ids": traci.lane.getLastStepVehicleIDs(lane_id),
-            "occupancy": traci.lane.getLastStepOccupancy(lane_id),
-            "mean_speed": traci.lane.getLastStepMeanSpeed(lane_id),
-            "waiting_time": traci.lane.getWaitingTime(lane_id)
-        }
+
+        :param measures: mesures des détecteurs par lane (DetectorLayer.lane_measures) ;
+                         les lanes équipées ne sont pas interrogées une à une
+        """
+        static = self._lane_static_info(lane_id)
+        measured = (measures or {}).get(lane_id)
+        if measured is not None:
+            dynamic = {
+                "num_vehicles": measured["num_vehicles"],
+                "vehicle_handles": self.vehicles.handles(measured["vehicle_ids"]),
+                "occupancy": measured["occupancy"],
+                "mean_speed": measured["mean_speed"],
+                "waiting_time": measured["waiting_time"],
+            }
+        else:
+            dynamic = {
+                "num_vehicles": traci.lane.getLastStepVehicleNumber(lane_id),
+                "vehicle_handles": self.vehicles.handles(traci.lane.getLastStepVehicleIDs(lane_id)),
+                "occupancy": traci.lane.getLastStepOccupancy(lane_id),
+                "mean_speed": traci.lane.getLastStepMeanSpeed(lane_id),
+                "waiting_time": traci.lane.getWaitingTime(lane_id),
+            }
+
+        return {"id": lane_id, **static, **dynamic}
+
+    def _lane_static_info(self, lane_id):
+        static = self._lane_static.get(lane_id)
+        if static is None:
+            static = self._lane_static[lane_id] = {
+                "edge_id": traci.lane.getEdgeID(lane_id),
+                "length": traci.lane.getLength(lane_id),
+                "max_speed": traci.lane.getMaxSpeed(lane_id),
+            }
+        return static
 
 
 
@@ -76,23 +104,36 @@ class Carrefour:
         """
         return {e: self.get_edge_info(e) for e in self.pedestrian_edges}
 
-    def get_vehicle_lanes_info(self):
+    def get_vehicle_lanes_info(self, measures=None):
         """
         Retourne toutes les lanes véhicules utiles pour traffic
         """
         lanes = []
         for edge in self.in_edges + self.out_edges:
             lanes.extend(self.edge_lanes.get(edge, []))
-        return {lane: self.get_lane_info(lane) for lane in lanes}
+        return {lane: self.get_lane_info(lane, measures) for lane in lanes}
 
-    def get_pedestrian_lanes_info(self):
+    def get_pedestrian_lanes_info(self, pedestrians=None):
         """
         Retourne toutes les lanes piétons pour traffic
+
+        :param pedestrians: état piétons du pas (PedestrianLayer.read)
         """
-        lanes = []
-        for edge in self.pedestrian_edges:
-            lanes.extend(self.edge_lanes.get(edge, []))
-        return {lane: self.get_lane_info(lane) for lane in lanes}
+        crossings = (pedestrians or {}).get("crossings", {})
+        persons = self._persons_by_edge(pedestrians)
+
+        lanes_info = {}
+        for edge in self._pedestrian_edges_with(persons):
+            crossing = crossings.get(edge)
+            for lane in self.edge_lanes.get(edge, []):
+                lanes_info[lane] = {
+                    "id": lane,
+                    **self._lane_static_info(lane),
+                    "num_persons": persons.get(edge, 0),
+                    "waiting": crossing["waiting"] if crossing else None,
+                    "max_waiting_time": crossing["max_waiting_time"] if crossing else None,
+                }
+        return lanes_info
 
     
 
@@ -109,18 +150,35 @@ class Carrefour:
         
         return {lane: traci.lane.getLastStepVehicleNumber(lane) for lane in vehicle_lanes}
 
-    def get_pedestrian_counts_by_lane(self):
+    def get_pedestrian_counts_by_lane(self, pedestrians=None):
         """
         Retourne le nombre de piétons par lane pour les lanes piétons
+        (personnes présentes sur l'edge : une seule lane par edge piéton)
+
+        :param pedestrians: état piétons du pas (PedestrianLayer.read), lu
+                            par abonnement de contexte au lieu d'une requête par edge
         """
-        ped_lanes = []
-        for edge in self.pedestrian_edges:
-            ped_lanes.extend(self.edge_lanes.get(edge, []))
-        
-        return {lane: traci.lane.getLastStepVehicleNumber(lane) for lane in ped_lanes}
+        persons = self._persons_by_edge(pedestrians)
+        counts = {}
+        for edge in self._pedestrian_edges_with(persons):
+            for lane in self.edge_lanes.get(edge, []):
+                counts[lane] = persons.get(edge, 0)
+
+        return counts
+
+    def _persons_by_edge(self, pedestrians):
+        persons = {}
+        for group in ("crossings", "walkingareas"):
+            for edge, values in (pedestrians or {}).get(group, {}).items():
+                persons[edge] = values["persons"]
+        return persons
+
+    def _pedestrian_edges_with(self, persons):
+        # edges piétons connus, plus les passages mesurés par la couche piétons
+        return list(dict.fromkeys(self.pedestrian_edges + list(persons)))
     
     def get_total_vehicle_count(self):
         return sum(self.get_vehicle_counts_by_lane().values())
 
-    def get_total_pedestrian_count(self):
-        return sum(self.get_pedestrian_counts_by_lane().values())
+    def get_total_pedestrian_count(self, pedestrians=None):
+        return (pedestrians or {}).get("total", 0)
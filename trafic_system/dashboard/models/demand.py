@@ -0,0 +1,126 @@
+import heapq
+import random
+from xml.sax.saxutils import quoteattr
+
+
+DEFAULT_VTYPE = {
+    "id": "car",
+    "length": "5.00",
+    "minGap": "2.50",
+    "maxSpeed": "13.90",
+    "vClass": "passenger",
+    "color": "red",
+    "accel": "2.6",
+    "decel": "4.5",
+}
+
+
+def sorted_profile(profile):
+    """
+    Périodes (début, fin, facteur) triées par début. Les départs de chaque
+    route sont produits période par période : elles doivent être ordonnées
+    et disjointes pour que le flux reste trié par temps.
+    """
+    periods = sorted((float(b), float(e), float(f)) for b, e, f in profile)
+    previous_end = None
+    for begin, end, factor in periods:
+        if begin < 0 or end <= begin:
+            raise ValueError(f"Période invalide : {begin:g}:{end:g} (attendu 0 <= début < fin)")
+        if factor < 0:
+            raise ValueError(f"Période {begin:g}:{end:g} : facteur négatif {factor:g}")
+        if previous_end is not None and begin < previous_end:
+            raise ValueError(f"Période {begin:g}:{end:g} chevauchant la précédente (fin {previous_end:g})")
+        previous_end = end
+    return periods
+
+
+class DemandGenerator:
+    """
+    Génère un fichier de routes SUMO en flux : les véhicules sont produits
+    dans l'ordre des départs et écrits au fil de l'eau, sans jamais tenir
+    la demande complète en mémoire (mémoire proportionnelle au nombre de routes).
+    """
+
+    def __init__(self, catalogue, vtype=None, seed=None):
+        """
+        :param catalogue: RouteCatalogue du réseau cible
+        :param vtype: attributs du vType utilisé (par défaut la voiture de carrefour.rou.xml)
+        :param seed: graine pour des fichiers reproductibles
+        """
+        self.catalogue = catalogue
+        self.vtype = dict(vtype or DEFAULT_VTYPE)
+        self.seed = seed
+
+    def rates_from_od_matrix(self, od_matrix):
+        """
+        Convertit une matrice origine-destination {"N": {"S": 400, ...}, ...}
+        (véhicules/heure) en débits par route du catalogue.
+        """
+        rates = {}
+        for origin, destinations in od_matrix.items():
+            for destination, veh_per_hour in destinations.items():
+                route_id = self.catalogue.find(origin, destination)
+                if route_id is None:
+                    raise ValueError(f"Aucune route entre {origin} et {destination}")
+                rates[route_id] = rates.get(route_id, 0) + float(veh_per_hour)
+        return rates
+
+    def iter_departures(self, rates, profile):
+        """
+        Départs (temps, route) triés par temps : arrivées de Poisson par route,
+        débit modulé par période, fusionnées à la volée.
+
+        :param rates: débits de base par route (véhicules/heure)
+        :param profile: liste de périodes (début, fin, facteur multiplicatif),
+                        disjointes, dans un ordre quelconque
+        """
+        profile = sorted_profile(profile)
+        rng = random.Random(self.seed)
+        streams = [
+            self._route_departures(route_id, rate, profile, random.Random(rng.random()))
+            for route_id, rate in sorted(rates.items())
+            if rate > 0
+        ]
+        return heapq.merge(*streams)
+
+    def _route_departures(self, route_id, rate, profile, rng):
+        for begin, end, factor in profile:
+            per_second = rate * factor / 3600.0
+            if per_second <= 0:
+                continue
+            t = begin + rng.expovariate(per_second)
+            while t < end:
+                yield t, route_id
+                t += rng.expovariate(per_second)
+
+    def write(self, path, rates, profile, id_prefix="veh"):
+        """
+        Écrit le fichier de routes. Retourne le nombre de véhicules écrits.
+        """
+        # validation avant d'ouvrir le fichier : pas de fichier tronqué
+        profile = sorted_profile(profile)
+        used_routes = sorted(r for r, rate in rates.items() if rate > 0)
+        count = 0
+
+        with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write('<routes xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                    'xsi:noNamespaceSchemaLocation="http://sumo.dlr.de/xsd/routes_file.xsd">\n')
+
+            attrs = " ".join(f"{k}={quoteattr(str(v))}" for k, v in self.vtype.items())
+            f.write(f"    <vType {attrs}/>\n\n")
+
+            for route_id in used_routes:
+                edges = " ".join(self.catalogue.get_edges(route_id))
+                f.write(f"    <route id={quoteattr(route_id)} edges={quoteattr(edges)}/>\n")
+            f.write("\n")
+
+            vtype_id = quoteattr(self.vtype["id"])
+            quoted_routes = {route_id: quoteattr(route_id) for route_id in used_routes}
+            for depart, route_id in self.iter_departures(rates, profile):
+                f.write(f'    <vehicle id="{id_prefix}_{count}" type={vtype_id} route={quoted_routes[route_id]} '
+                        f'depart="{depart:.2f}" departLane="best" departSpeed="max"/>\n')
+                count += 1
+
+            f.write("</routes>\n")
+
+        return count
@@ -0,0 +1,189 @@
+import traci
+import traci.constants as tc
+from xml.sax.saxutils import quoteattr
+
+
+E2_PREFIX = "e2_"
+E1_PREFIX = "e1_"
+
+# Distance (m) entre la boucle E1 et la ligne d'arrêt
+E1_STOP_LINE_OFFSET = 1.0
+
+E2_VARIABLES = [
+    tc.LAST_STEP_VEHICLE_NUMBER,
+    tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+    tc.LAST_STEP_MEAN_SPEED,
+    tc.LAST_STEP_OCCUPANCY,
+    tc.JAM_LENGTH_METERS,
+    tc.VAR_LAST_INTERVAL_OCCUPANCY,
+    tc.VAR_LAST_INTERVAL_SPEED,
+    tc.VAR_LAST_INTERVAL_MAX_JAM_LENGTH_METERS,
+    tc.LAST_STEP_VEHICLE_ID_LIST,
+]
+
+# Les E2 ne mesurent pas l'attente : abonnement sur la lane équipée elle-même
+LANE_VARIABLES = [tc.VAR_WAITING_TIME]
+
+E1_VARIABLES = [
+    tc.LAST_STEP_VEHICLE_NUMBER,
+    tc.VAR_LAST_INTERVAL_NUMBER,
+    tc.VAR_LAST_INTERVAL_SPEED,
+    tc.VAR_LAST_INTERVAL_OCCUPANCY,
+]
+
+
+# Sorties XML des détecteurs jetées : les mesures sont lues par TraCI, et un
+# fichier commun serait écrit en même temps par chaque instance de SUMO
+# (dashboard, serveur de charge, workers de l'environnement vectorisé)
+DISCARD_OUTPUT = "NUL"
+
+
+def write_detectors_file(network, path, period=60, output_file=DISCARD_OUTPUT):
+    """
+    Écrit un fichier additionnel avec, sur chaque lane entrante, un détecteur
+    de zone (E2) couvrant la lane et une boucle (E1) avant la ligne d'arrêt.
+
+    :param network: Network du scénario
+    :param period: période d'agrégation SUMO des détecteurs (s)
+    :param output_file: fichier de sortie XML des détecteurs (par défaut aucun)
+    :return: liste des lanes équipées
+    """
+    lanes = network.incoming_lanes()
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<additional>\n")
+        f.write(f"    <!-- Détecteurs générés pour {network.net_file.name} (période {period} s) -->\n")
+        for lane in lanes:
+            length = network.lanes[lane]["length"]
+            lane_attr = quoteattr(lane)
+            f.write(f"    <laneAreaDetector id={quoteattr(E2_PREFIX + lane)} lane={lane_attr} "
+                    f'pos="0.00" length="{length:.2f}" period="{period}" file={quoteattr(output_file)}/>\n')
+            f.write(f"    <inductionLoop id={quoteattr(E1_PREFIX + lane)} lane={lane_attr} "
+                    f'pos="{max(0.0, length - E1_STOP_LINE_OFFSET):.2f}" period="{period}" '
+                    f"file={quoteattr(output_file)}/>\n")
+        f.write("</additional>\n")
+
+    return lanes
+
+
+class DetectorLayer:
+    """
+    Mesures par lane entrante et par approche (N, S, E, W) lues via les
+    abonnements TraCI des détecteurs E2/E1 : une lecture groupée par pas
+    au lieu de requêtes individuelles sur chaque lane.
+    """
+
+    def __init__(self, network):
+        self.network = network
+        self.e2_ids = [d for d in traci.lanearea.getIDList() if d.startswith(E2_PREFIX)]
+        self.e1_ids = [d for d in traci.inductionloop.getIDList() if d.startswith(E1_PREFIX)]
+
+        # detecteur -> (lane, approche), résolu une seule fois
+        self._lanes = {}
+        for det in self.e2_ids:
+            self._lanes[det] = self._lane_and_approach(traci.lanearea.getLaneID(det))
+        for det in self.e1_ids:
+            self._lanes[det] = self._lane_and_approach(traci.inductionloop.getLaneID(det))
+
+    def _lane_and_approach(self, lane):
+        approach = self.network.lane_approach(lane) if lane in self.network.lanes else None
+        return lane, approach
+
+    def subscribe(self):
+        for det in self.e2_ids:
+            traci.lanearea.subscribe(det, E2_VARIABLES)
+        for det in self.e1_ids:
+            traci.inductionloop.subscribe(det, E1_VARIABLES)
+        for det in self.e2_ids:
+            traci.lane.subscribe(self._lanes[det][0], LANE_VARIABLES)
+
+    def lane_measures(self):
+        """
+        Mesures dynamiques des lanes équipées d'un E2 (le détecteur couvre
+        toute la lane), au format de Carrefour.get_lane_info :
+        {lane: {"num_vehicles", "vehicle_ids", "occupancy", "mean_speed", "waiting_time"}},
+        dans les unités des getters traci.lane (occupation 0-1, vitesse max si vide)
+        """
+        e2_results = traci.lanearea.getAllSubscriptionResults()
+        lane_results = traci.lane.getAllSubscriptionResults()
+
+        measures = {}
+        for det in self.e2_ids:
+            values = e2_results.get(det)
+            if not values:
+                continue
+            lane = self._lanes[det][0]
+            mean_speed = values[tc.LAST_STEP_MEAN_SPEED]
+            if mean_speed < 0:
+                # E2 vide : -1, là où traci.lane renvoie la vitesse max de la lane
+                mean_speed = self.network.lanes[lane]["speed"] if lane in self.network.lanes else None
+            measures[lane] = {
+                "num_vehicles": values[tc.LAST_STEP_VEHICLE_NUMBER],
+                "vehicle_ids": values[tc.LAST_STEP_VEHICLE_ID_LIST],
+                # E2 en %, traci.lane en fraction (0-1)
+                "occupancy": values[tc.LAST_STEP_OCCUPANCY] / 100.0,
+                "mean_speed": mean_speed,
+                "waiting_time": lane_results.get(lane, {}).get(tc.VAR_WAITING_TIME, 0.0),
+            }
+        return measures
+
+    def read(self):
+        """
+        Valeurs du dernier pas (et du dernier intervalle agrégé par SUMO),
+        par lane et par approche.
+        """
+        e2_results = traci.lanearea.getAllSubscriptionResults()
+        e1_results = traci.inductionloop.getAllSubscriptionResults()
+
+        lanes = {}
+        approaches = {}
+
+        for det in self.e2_ids:
+            values = e2_results.get(det)
+            if not values:
+                continue
+            lane, approach = self._lanes[det]
+            lanes[lane] = {
+                "approach": approach,
+                "vehicles": values[tc.LAST_STEP_VEHICLE_NUMBER],
+                "queue": values[tc.LAST_STEP_VEHICLE_HALTING_NUMBER],
+                "jam_length": values[tc.JAM_LENGTH_METERS],
+                "mean_speed": values[tc.LAST_STEP_MEAN_SPEED],
+                "occupancy": values[tc.LAST_STEP_OCCUPANCY],
+                "interval_occupancy": values[tc.VAR_LAST_INTERVAL_OCCUPANCY],
+                "interval_speed": values[tc.VAR_LAST_INTERVAL_SPEED],
+                "interval_max_jam_length": values[tc.VAR_LAST_INTERVAL_MAX_JAM_LENGTH_METERS],
+            }
+
+            totals = approaches.setdefault(approach, self._empty_approach())
+            totals["vehicles"] += values[tc.LAST_STEP_VEHICLE_NUMBER]
+            totals["queue"] += values[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+            totals["jam_length"] = max(totals["jam_length"], values[tc.JAM_LENGTH_METERS])
+            totals["interval_max_jam_length"] = max(totals["interval_max_jam_length"],
+                                                    values[tc.VAR_LAST_INTERVAL_MAX_JAM_LENGTH_METERS])
+
+        for det in self.e1_ids:
+            values = e1_results.get(det)
+            if not values:
+                continue
+            lane, approach = self._lanes[det]
+            lane_info = lanes.setdefault(lane, {"approach": approach})
+            lane_info["interval_count"] = values[tc.VAR_LAST_INTERVAL_NUMBER]
+            lane_info["interval_passing_speed"] = values[tc.VAR_LAST_INTERVAL_SPEED]
+
+            totals = approaches.setdefault(approach, self._empty_approach())
+            totals["interval_count"] += values[tc.VAR_LAST_INTERVAL_NUMBER]
+
+        return {
+            "lanes": lanes,
+            "approaches": approaches,
+        }
+
+    def _empty_approach(self):
+        return {
+            "vehicles": 0,
+            "queue": 0,
+            "jam_length": 0.0,
+            "interval_max_jam_length": 0.0,
+            "interval_count": 0,
+        }
@@ -0,0 +1,157 @@
+# Environnement Gymnasium du carrefour, pour entraîner des politiques de
+# contrôle des feux sans passer par l'API HTTP. Dépend de numpy et gymnasium :
+# non importé par dashboard.models, le serveur web n'en a pas besoin.
+import itertools
+from functools import partial
+
+import gymnasium as gym
+import numpy as np
+import traci
+import traci.constants as tc
+from gymnasium import spaces
+
+from .carrefour import Carrefour
+from .network import load_network, net_file_from_config
+
+
+# Une ligne d'observation par lane entrante contrôlée
+LANE_VARIABLES = [
+    tc.LAST_STEP_VEHICLE_NUMBER,
+    tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+    tc.LAST_STEP_OCCUPANCY,
+    tc.LAST_STEP_MEAN_SPEED,
+    tc.VAR_WAITING_TIME,
+]
+
+# Actions du mode "direction" : directions prioritaires (voir TrafficLight)
+DIRECTION_ACTIONS = ("NS", "WE", "N", "S", "W", "E")
+
+_labels = itertools.count()
+
+
+class CarrefourEnv(gym.Env):
+    """
+    Un épisode = une simulation SUMO sans interface. Toutes les
+    `decision_interval` secondes simulées, l'agent choisit une phase du
+    programme (mode "phase") ou une direction prioritaire (mode "direction").
+
+    Observation : tableau (lanes, 5) = véhicules, véhicules arrêtés,
+    occupation, vitesse moyenne, temps d'attente par lane entrante.
+    Récompense : opposé du nombre de véhicules arrêtés sur ces lanes.
+    """
+
+    metadata = {"render_modes": []}
+
+    def __init__(self, sumo_cfg, sumo_binary="sumo", sumo_args=None, action_mode="phase",
+                 decision_interval=5, episode_length=3600):
+        """
+        :param sumo_cfg: fichier .sumocfg du scénario
+        :param action_mode: "phase" ou "direction"
+        :param decision_interval: secondes simulées entre deux actions
+        :param episode_length: durée maximale d'un épisode (secondes simulées)
+        """
+        if action_mode not in ("phase", "direction"):
+            raise ValueError(f"Mode d'action inconnu : {action_mode}")
+
+        self.sumo_cfg = sumo_cfg
+        self.sumo_binary = sumo_binary
+        self.sumo_args = list(sumo_args or [])
+        self.action_mode = action_mode
+        self.decision_interval = decision_interval
+        self.episode_length = episode_length
+
+        # Espaces calculés depuis le réseau, sans lancer SUMO
+        network = load_network(net_file_from_config(sumo_cfg))
+        self.lanes = network.incoming_lanes()
+        phases = next(iter(network.tl_logics.values()))["phases"] if network.tl_logics else []
+
+        if action_mode == "phase":
+            self.action_space = spaces.Discrete(len(phases))
+        else:
+            self.action_space = spaces.Discrete(len(DIRECTION_ACTIONS))
+        self.observation_space = spaces.Box(0.0, np.inf, shape=(len(self.lanes), len(LANE_VARIABLES)),
+                                            dtype=np.float32)
+
+        self.carrefour = None
+        self._label = f"env-{next(_labels)}"
+        self._connected = False
+        self._start_time = 0.0
+
+    #============================
+    # API Gymnasium
+    #============================
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        sumo_seed = int(self.np_random.integers(2 ** 31 - 1))
+        args = ["-c", self.sumo_cfg, "--seed", str(sumo_seed), "--no-step-log", "--no-warnings"] + self.sumo_args
+
+        if self._connected:
+            # Rechargement dans le même processus SUMO : évite un redémarrage
+            traci.switch(self._label)
+            traci.load(args)
+        else:
+            traci.start([self.sumo_binary] + args, label=self._label)
+            self._connected = True
+
+        self.carrefour = Carrefour()
+        for lane in self.lanes:
+            traci.lane.subscribe(lane, LANE_VARIABLES)
+
+        traci.simulationStep()
+        self._start_time = traci.simulation.getTime()
+
+        return self._observe(), {"time": self._start_time}
+
+    def step(self, action):
+        traci.switch(self._label)
+        self._apply(int(action))
+
+        traci.simulationStep(traci.simulation.getTime() + self.decision_interval)
+        time = traci.simulation.getTime()
+
+        observation = self._observe()
+        reward = -float(observation[:, 1].sum())
+        terminated = traci.simulation.getMinExpectedNumber() == 0
+        truncated = time - self._start_time >= self.episode_length
+
+        return observation, reward, terminated, truncated, {"time": time}
+
+    def close(self):
+        if self._connected:
+            traci.switch(self._label)
+            traci.close()
+            self._connected = False
+
+    #============================
+    # Internes
+    #============================
+
+    def _apply(self, action):
+        tl = self.carrefour.TL
+        if self.action_mode == "phase":
+            if traci.trafficlight.getPhase(tl._id) != action:
+                traci.trafficlight.setPhase(tl._id, action)
+        else:
+            tl.prioritize_lane_by_direction(DIRECTION_ACTIONS[action])
+
+    def _observe(self):
+        results = traci.lane.getAllSubscriptionResults()
+        observation = np.zeros(self.observation_space.shape, dtype=np.float32)
+        for i, lane in enumerate(self.lanes):
+            values = results.get(lane)
+            if values:
+                observation[i] = [values[var] for var in LANE_VARIABLES]
+        return observation
+
+
+def make_vector_env(sumo_cfg, num_envs, shared_memory=True, **kwargs):
+    """
+    `num_envs` environnements dans autant de processus, avancés en parallèle
+    et au même rythme (un SUMO par processus). Les observations transitent
+    par mémoire partagée.
+
+    :param kwargs: paramètres de CarrefourEnv
+    """
+    env_fns = [partial(CarrefourEnv, sumo_cfg, **kwargs) for _ in range(num_envs)]
+    return gym.vector.AsyncVectorEnv(env_fns, shared_memory=shared_memory)
@@ -0,0 +1,130 @@
+import math
+
+
+# Directions par secteur de 90° centré sur les axes (0 = est, sens trigonométrique)
+DIRECTIONS = ("E", "N", "O", "S")
+
+
+def simplify(points, tolerance):
+    """
+    Réduction d'une polyligne (Ramer-Douglas-Peucker) : supprime les points
+    situés à moins de `tolerance` mètres du segment qui les englobe.
+    Les extrémités sont toujours conservées.
+    """
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        norm = math.hypot(dx, dy)
+
+        farthest, distance = None, tolerance
+        for i in range(first + 1, last):
+            x, y = points[i]
+            if norm:
+                d = abs(dy * (x - x1) - dx * (y - y1)) / norm
+            else:
+                d = math.hypot(x - x1, y - y1)
+            if d > distance:
+                farthest, distance = i, d
+
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+def quantize(points, origin, resolution):
+    """
+    Encode une polyligne en entiers : coordonnées en unités de `resolution`
+    mètres par rapport à `origin`, premier point absolu puis différences
+    successives, à plat : [x0, y0, dx1, dy1, ...].
+    """
+    encoded = []
+    px = py = 0
+    for x, y in points:
+        qx = round((x - origin[0]) / resolution)
+        qy = round((y - origin[1]) / resolution)
+        encoded.append(qx - px)
+        encoded.append(qy - py)
+        px, py = qx, qy
+    return encoded
+
+
+_DIRECTION_CACHE = {}
+
+
+def lane_directions(network):
+    """
+    Direction principale (N, O, S, E) de chaque lane d'après sa forme
+    (premier et dernier point), calculée une fois par contenu du réseau.
+    """
+    cached = _DIRECTION_CACHE.get(network.digest)
+    if cached is not None:
+        return cached
+
+    directions = {}
+    for lane, info in network.lanes.items():
+        shape = info["shape"]
+        if len(shape) < 2:
+            directions[lane] = "unknown"
+            continue
+        (x1, y1), (x2, y2) = shape[0], shape[-1]
+        angle = math.degrees(math.atan2(y2 - y1, x2 - x1)) % 360
+        directions[lane] = DIRECTIONS[int((angle + 45) // 90) % 4]
+
+    _DIRECTION_CACHE[network.digest] = directions
+    return directions
+
+
+_GEOMETRY_CACHE = {}
+
+
+def geometry_payload(network, tolerance=0.5, resolution=0.1):
+    """
+    Géométrie compacte du réseau pour le dessin côté front : formes des
+    lanes et jonctions simplifiées puis quantifiées (voir `quantize`).
+    Calculée une fois par contenu du .net.xml.
+
+    :param tolerance: écart maximal toléré par la simplification (mètres)
+    :param resolution: pas de quantification (mètres par unité)
+    """
+    key = (network.digest, tolerance, resolution)
+    payload = _GEOMETRY_CACHE.get(key)
+    if payload is not None:
+        return payload
+
+    shapes = [info["shape"] for info in network.lanes.values()]
+    shapes += [info["shape"] for info in network.junctions.values()]
+    points = [p for shape in shapes for p in shape]
+    origin = (min(x for x, _ in points), min(y for _, y in points)) if points else (0.0, 0.0)
+
+    directions = lane_directions(network)
+    payload = {
+        "origin": list(origin),
+        "resolution": resolution,
+        "lanes": {
+            lane: {
+                "shape": quantize(simplify(info["shape"], tolerance), origin, resolution),
+                "width": info["width"],
+                "direction": directions[lane],
+            }
+            for lane, info in network.lanes.items()
+        },
+        "junctions": {
+            junction: quantize(simplify(info["shape"], tolerance), origin, resolution)
+            for junction, info in network.junctions.items()
+            if info["shape"]
+        },
+    }
+
+    _GEOMETRY_CACHE[key] = payload
+    return payload
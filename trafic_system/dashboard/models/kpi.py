@@ -0,0 +1,172 @@
+import threading
+
+import traci
+import traci.constants as tc
+
+from .statistics import P2Quantile, RunningStats
+
+
+VEHICLE_VARIABLES = [tc.VAR_ROUTE_ID, tc.VAR_ROAD_ID, tc.VAR_TIMELOSS]
+
+
+class GroupKpi:
+    """
+    Indicateurs cumulés d'un groupe (approche ou route) : compteurs
+    d'entrées/sorties, retard par véhicule (moyenne, variance, quantiles).
+    """
+
+    __slots__ = ("departed", "arrived", "delay", "delay_p50", "delay_p95")
+
+    def __init__(self):
+        self.departed = 0
+        self.arrived = 0
+        self.delay = RunningStats()
+        self.delay_p50 = P2Quantile(0.5)
+        self.delay_p95 = P2Quantile(0.95)
+
+    def add_delay(self, delay):
+        self.arrived += 1
+        self.delay.add(delay)
+        self.delay_p50.add(delay)
+        self.delay_p95.add(delay)
+
+    def to_dict(self, elapsed):
+        return {
+            "departed": self.departed,
+            "arrived": self.arrived,
+            "throughput_veh_h": self.arrived * 3600 / elapsed if elapsed > 0 else None,
+            "delay": self.delay.to_dict(),
+            "delay_p50": self.delay_p50.value,
+            "delay_p95": self.delay_p95.value,
+        }
+
+
+class KpiAggregator:
+    """
+    Agrégation en ligne des KPI dans la boucle de simulation, en mémoire
+    constante : seuls les véhicules présents dans le réseau sont suivis.
+    """
+
+    def __init__(self, network, detectors=None):
+        self.network = network
+        self.detectors = detectors
+        self._incoming_edges = {network.lanes[lane]["edge"] for lane in network.incoming_lanes()}
+
+        self.start_time = None
+        self.time = None
+        self.approaches = {}
+        self.routes = {}
+        self.queues = {}
+
+        # vehicule -> [route, approche, temps perdu]
+        self._active = {}
+        # route -> approche de son premier edge
+        self._route_approaches = {}
+        self._lock = threading.Lock()
+
+    def on_step(self):
+        """
+        À appeler après chaque traci.simulationStep().
+        """
+        with self._lock:
+            self.time = traci.simulation.getTime()
+            if self.start_time is None:
+                self.start_time = self.time
+
+            self._track_departures()
+            self._update_active()
+            self._track_arrivals()
+            self._track_queues()
+
+    def sync(self):
+        """
+        À appeler après un saut de plusieurs pas, dont les listes de départs
+        et d'arrivées ne couvrent que le dernier pas : réaligne les véhicules
+        suivis sur ceux présents. Les disparus comptent comme arrivés avec leur
+        dernier temps perdu connu, les nouveaux comme partis. Un véhicule
+        entré et sorti pendant le saut reste invisible.
+        """
+        present = set(traci.vehicle.getIDList())
+        with self._lock:
+            for veh_id in [v for v in self._active if v not in present]:
+                self._arrive(veh_id)
+            for veh_id in present:
+                if veh_id not in self._active:
+                    self._depart(veh_id)
+
+    def _group(self, groups, key):
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = GroupKpi()
+        return group
+
+    def _track_departures(self):
+        for veh_id in traci.simulation.getDepartedIDList():
+            self._depart(veh_id)
+
+    def _depart(self, veh_id):
+        traci.vehicle.subscribe(veh_id, VEHICLE_VARIABLES)
+        values = traci.vehicle.getSubscriptionResults(veh_id)
+
+        edge = values.get(tc.VAR_ROAD_ID)
+        route = values.get(tc.VAR_ROUTE_ID)
+        if edge in self._incoming_edges:
+            approach = self.network.approach_of(edge)
+        else:
+            # déjà engagé plus loin (départ pendant un saut) : premier edge de la route
+            approach = self._route_approach(route)
+
+        self._active[veh_id] = [route, approach, values.get(tc.VAR_TIMELOSS, 0.0)]
+        self._group(self.approaches, approach).departed += 1
+        self._group(self.routes, route).departed += 1
+
+    def _route_approach(self, route):
+        if route is None:
+            return None
+        if route not in self._route_approaches:
+            edges = traci.route.getEdges(route)
+            first = edges[0] if edges else None
+            self._route_approaches[route] = self.network.approach_of(first) if first in self._incoming_edges else None
+        return self._route_approaches[route]
+
+    def _update_active(self):
+        for veh_id, values in traci.vehicle.getAllSubscriptionResults().items():
+            entry = self._active.get(veh_id)
+            if entry is not None and tc.VAR_TIMELOSS in values:
+                entry[2] = values[tc.VAR_TIMELOSS]
+
+    def _track_arrivals(self):
+        for veh_id in traci.simulation.getArrivedIDList():
+            self._arrive(veh_id)
+
+    def _arrive(self, veh_id):
+        entry = self._active.pop(veh_id, None)
+        if entry is None:
+            return
+        route, approach, delay = entry
+        self._group(self.approaches, approach).add_delay(delay)
+        self._group(self.routes, route).add_delay(delay)
+
+    def _track_queues(self):
+        if self.detectors is None:
+            return
+        for approach, values in self.detectors.read()["approaches"].items():
+            self.queues.setdefault(approach, RunningStats()).add(values["queue"])
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = (self.time - self.start_time) if self.time is not None else 0
+            return {
+                "time": self.time,
+                "elapsed": elapsed,
+                "active_vehicles": len(self._active),
+                "approaches": {
+                    str(a): kpi.to_dict(elapsed) for a, kpi in self.approaches.items()
+                },
+                "routes": {
+                    str(r): kpi.to_dict(elapsed) for r, kpi in self.routes.items()
+                },
+                "queue": {
+                    a: {"mean": stats.mean, "max": stats.max} for a, stats in self.queues.items()
+                },
+            }
@@ -0,0 +1,232 @@
+import hashlib
+import math
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+
+def sumocfg_options(sumo_cfg):
+    """
+    Lit les options d'un fichier .sumocfg (ex: {"net-file": "...", "route-files": "..."}).
+    Les chemins restent relatifs au dossier du fichier de configuration.
+    """
+    options = {}
+    for _, elem in ET.iterparse(sumo_cfg):
+        if "value" in elem.attrib:
+            options[elem.tag] = elem.attrib["value"]
+    return options
+
+
+def net_file_from_config(sumo_cfg):
+    """
+    Retourne le chemin absolu du réseau référencé par un .sumocfg.
+    """
+    net_file = sumocfg_options(sumo_cfg)["net-file"]
+    return (Path(sumo_cfg).resolve().parent / net_file).resolve()
+
+
+def config_input_files(sumo_cfg):
+    """
+    Fichiers d'entrée d'un scénario : le .sumocfg lui-même, puis le réseau,
+    les routes et les fichiers additionnels qu'il référence.
+    """
+    cfg = Path(sumo_cfg).resolve()
+    options = sumocfg_options(cfg)
+
+    files = [cfg]
+    for option in ("net-file", "route-files", "additional-files"):
+        for name in options.get(option, "").replace(",", " ").split():
+            files.append((cfg.parent / name).resolve())
+    return files
+
+
+_DIGEST_CACHE = {}
+
+
+def config_digest(sumo_cfg):
+    """
+    Empreinte (sha1) du contenu de tous les fichiers d'entrée d'un scénario,
+    recalculée uniquement si l'un d'eux a changé.
+    """
+    files = config_input_files(sumo_cfg)
+    key = tuple((str(f), f.stat().st_size, f.stat().st_mtime_ns) for f in files if f.exists())
+
+    digest = _DIGEST_CACHE.get(key)
+    if digest is None:
+        sha = hashlib.sha1()
+        for f in files:
+            if f.exists():
+                sha.update(f.read_bytes())
+        digest = _DIGEST_CACHE[key] = sha.hexdigest()
+    return digest
+
+
+def _parse_shape(shape):
+    if not shape:
+        return []
+    return [tuple(float(v) for v in point.split(",")[:2]) for point in shape.split()]
+
+
+_NETWORK_CACHE = {}
+
+
+def load_network(net_file):
+    """
+    Charge un réseau une seule fois : le résultat est mis en cache tant que
+    le fichier n'a pas changé (chemin, taille, date de modification).
+    """
+    path = Path(net_file).resolve()
+    stat = os.stat(path)
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+
+    network = _NETWORK_CACHE.get(key)
+    if network is None:
+        network = Network(path)
+        _NETWORK_CACHE[key] = network
+    return network
+
+
+class Network:
+    """
+    Topologie d'un réseau SUMO lue directement depuis le .net.xml
+    (edges, lanes, jonctions, connexions), sans passer par TraCI.
+    """
+
+    def __init__(self, net_file):
+        self.net_file = Path(net_file)
+        self.digest = hashlib.sha1(self.net_file.read_bytes()).hexdigest()
+
+        self.edges = {}
+        self.lanes = {}
+        self.junctions = {}
+        self.connections = []
+        self.tl_logics = {}
+
+        self._parse()
+
+    def _parse(self):
+        current_edge = None
+        current_tl = None
+
+        for event, elem in ET.iterparse(self.net_file, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == "edge":
+                    current_edge = elem.attrib["id"]
+                    self.edges[current_edge] = {
+                        "id": current_edge,
+                        "from": elem.attrib.get("from"),
+                        "to": elem.attrib.get("to"),
+                        "function": elem.attrib.get("function", "normal"),
+                        "crossing_edges": elem.attrib.get("crossingEdges", "").split(),
+                        "lanes": [],
+                    }
+                elif tag == "tlLogic":
+                    current_tl = elem.attrib["id"]
+                    self.tl_logics[current_tl] = {
+                        "id": current_tl,
+                        "type": elem.attrib.get("type"),
+                        "programID": elem.attrib.get("programID"),
+                        "phases": [],
+                    }
+                continue
+
+            if tag == "lane" and current_edge is not None:
+                lane_id = elem.attrib["id"]
+                self.lanes[lane_id] = {
+                    "id": lane_id,
+                    "edge": current_edge,
+                    "index": int(elem.attrib.get("index", 0)),
+                    "length": float(elem.attrib.get("length", 0)),
+                    "speed": float(elem.attrib.get("speed", 0)),
+                    "width": float(elem.attrib.get("width", 3.2)),
+                    "allow": elem.attrib.get("allow", "").split(),
+                    "disallow": elem.attrib.get("disallow", "").split(),
+                    "shape": _parse_shape(elem.attrib.get("shape")),
+                }
+                self.edges[current_edge]["lanes"].append(lane_id)
+            elif tag == "edge":
+                current_edge = None
+            elif tag == "phase" and current_tl is not None:
+                self.tl_logics[current_tl]["phases"].append(dict(elem.attrib))
+            elif tag == "tlLogic":
+                current_tl = None
+            elif tag == "junction":
+                self.junctions[elem.attrib["id"]] = {
+                    "id": elem.attrib["id"],
+                    "type": elem.attrib.get("type"),
+                    "x": float(elem.attrib.get("x", 0)),
+                    "y": float(elem.attrib.get("y", 0)),
+                    "inc_lanes": elem.attrib.get("incLanes", "").split(),
+                    "shape": _parse_shape(elem.attrib.get("shape")),
+                }
+            elif tag == "connection":
+                self.connections.append({
+                    "from": elem.attrib["from"],
+                    "to": elem.attrib["to"],
+                    "from_lane": int(elem.attrib["fromLane"]),
+                    "to_lane": int(elem.attrib["toLane"]),
+                    "dir": elem.attrib.get("dir"),
+                    "tl": elem.attrib.get("tl"),
+                    "link_index": int(elem.attrib["linkIndex"]) if "linkIndex" in elem.attrib else None,
+                })
+            elem.clear()
+
+    #============================
+    # Requêtes
+    #============================
+
+    def is_internal(self, edge_id):
+        return self.edges[edge_id]["function"] != "normal"
+
+    def normal_edges(self):
+        return [e for e, info in self.edges.items() if info["function"] == "normal"]
+
+    def edges_by_function(self, function):
+        return [e for e, info in self.edges.items() if info["function"] == function]
+
+    def lane_allows(self, lane_id, vclass):
+        lane = self.lanes[lane_id]
+        if lane["allow"]:
+            return vclass in lane["allow"] or "all" in lane["allow"]
+        return vclass not in lane["disallow"]
+
+    def edge_allows(self, edge_id, vclass):
+        return any(self.lane_allows(lane, vclass) for lane in self.edges[edge_id]["lanes"])
+
+    def incoming_lanes(self, vclass="passenger"):
+        """
+        Lanes entrantes d'un carrefour à feux : lanes de départ des connexions
+        contrôlées par un feu, autorisées pour la classe de véhicule donnée.
+        """
+        lanes = []
+        for conn in self.connections:
+            if conn["tl"] is None or self.is_internal(conn["from"]):
+                continue
+            lane = self.edges[conn["from"]]["lanes"][conn["from_lane"]]
+            if lane not in lanes and self.lane_allows(lane, vclass):
+                lanes.append(lane)
+        return lanes
+
+    def approach_of(self, edge_id):
+        """
+        Côté d'arrivée (N, S, E, W) d'un edge, d'après la position de son noeud
+        de départ par rapport à son noeud d'arrivée.
+        """
+        edge = self.edges[edge_id]
+        start = self.junctions.get(edge["from"])
+        end = self.junctions.get(edge["to"])
+        if start is None or end is None:
+            return None
+
+        angle = math.degrees(math.atan2(start["y"] - end["y"], start["x"] - end["x"])) % 360
+        if 45 <= angle < 135:
+            return "N"
+        elif 135 <= angle < 225:
+            return "W"
+        elif 225 <= angle < 315:
+            return "S"
+        return "E"
+
+    def lane_approach(self, lane_id):
+        return self.approach_of(self.lanes[lane_id]["edge"])
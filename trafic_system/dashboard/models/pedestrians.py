@@ -0,0 +1,104 @@
+import math
+
+import traci
+import traci.constants as tc
+
+
+PERSON_VARIABLES = [tc.VAR_ROAD_ID, tc.VAR_NEXT_EDGE, tc.VAR_SPEED, tc.VAR_WAITING_TIME]
+
+# En dessous de cette vitesse (m/s), un piéton est considéré à l'arrêt
+WAITING_SPEED = 0.1
+
+
+def _junction_of(edge_id):
+    # ":C_c0" -> "C", ":C_w1" -> "C"
+    return edge_id[1:].rsplit("_", 1)[0]
+
+
+class PedestrianLayer:
+    """
+    Mesures piétons des carrefours à feux : personnes sur chaque passage et
+    chaque zone d'attente, piétons arrêtés devant chaque passage et temps
+    d'attente. Un abonnement de contexte (domaine personne) par jonction
+    renvoie tous les piétons proches en une seule lecture par pas.
+    """
+
+    def __init__(self, network):
+        self.network = network
+        self.crossings = network.edges_by_function("crossing")
+        # zones d'attente des seules jonctions ayant des passages
+        crossing_junctions = {_junction_of(c) for c in self.crossings}
+        self.walkingareas = [w for w in network.edges_by_function("walkingarea")
+                             if _junction_of(w) in crossing_junctions]
+
+        # passage -> approche dont il coupe l'edge entrant (N, S, E, W)
+        self._approaches = {c: self._crossing_approach(c) for c in self.crossings}
+
+        # jonction -> rayon couvrant ses passages et zones d'attente
+        self.junctions = {}
+        for edge in self.crossings + self.walkingareas:
+            junction_id = _junction_of(edge)
+            junction = network.junctions.get(junction_id)
+            if junction is None:
+                continue
+            for lane in network.edges[edge]["lanes"]:
+                for x, y in network.lanes[lane]["shape"]:
+                    radius = math.hypot(x - junction["x"], y - junction["y"]) + 1.0
+                    self.junctions[junction_id] = max(self.junctions.get(junction_id, 0.0), radius)
+
+    def _crossing_approach(self, crossing):
+        junction = _junction_of(crossing)
+        for edge in self.network.edges[crossing]["crossing_edges"]:
+            if edge in self.network.edges and self.network.edges[edge]["to"] == junction:
+                return self.network.approach_of(edge)
+        return None
+
+    def subscribe(self):
+        for junction, radius in self.junctions.items():
+            traci.junction.subscribeContext(junction, tc.CMD_GET_PERSON_VARIABLE, radius, PERSON_VARIABLES)
+
+    def read(self):
+        """
+        État piétons du dernier pas, par passage et par zone d'attente.
+        """
+        crossings = {
+            c: {"approach": self._approaches[c], "persons": 0, "waiting": 0, "max_waiting_time": 0.0}
+            for c in self.crossings
+        }
+        walkingareas = {w: {"persons": 0} for w in self.walkingareas}
+
+        seen = set()
+        waiting_times = []
+        for junction in self.junctions:
+            persons = traci.junction.getContextSubscriptionResults(junction) or {}
+            for person_id, values in persons.items():
+                # zones de contexte de deux jonctions proches : compter une fois
+                if person_id in seen:
+                    continue
+                seen.add(person_id)
+                edge = values.get(tc.VAR_ROAD_ID)
+                waiting_time = values.get(tc.VAR_WAITING_TIME, 0.0)
+                if waiting_time > 0:
+                    waiting_times.append(waiting_time)
+
+                if edge in crossings:
+                    crossings[edge]["persons"] += 1
+                elif edge in walkingareas:
+                    walkingareas[edge]["persons"] += 1
+
+                    # arrêté sur la zone d'attente, devant le passage suivant
+                    crossing = crossings.get(values.get(tc.VAR_NEXT_EDGE))
+                    if crossing is not None and values.get(tc.VAR_SPEED, 0.0) < WAITING_SPEED:
+                        crossing["waiting"] += 1
+                        crossing["max_waiting_time"] = max(crossing["max_waiting_time"], waiting_time)
+
+        return {
+            "total": len(seen),
+            "crossings": crossings,
+            "walkingareas": walkingareas,
+            "waiting_time": {
+                "count": len(waiting_times),
+                "mean": sum(waiting_times) / len(waiting_times) if waiting_times else None,
+                "max": max(waiting_times) if waiting_times else None,
+            },
+        }
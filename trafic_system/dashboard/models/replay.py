@@ -0,0 +1,299 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+
+# Un enregistrement d'index par pas : (temps simulé, offset, longueur)
+INDEX_RECORD = struct.Struct("<dQI")
+
+DATA_SUFFIX = ".steps"
+INDEX_SUFFIX = ".idx"
+
+# Journal parallèle du registre des véhicules (un enregistrement par pas) :
+# un pas sur VEHICLES_CHECKPOINT porte le dictionnaire handle -> id complet,
+# les autres seulement ses changements depuis le pas précédent
+VEHICLES_DATA_SUFFIX = ".veh"
+VEHICLES_INDEX_SUFFIX = ".vidx"
+VEHICLES_CHECKPOINT = 100
+
+
+class StepLogWriter:
+    """
+    Journal de pas en ajout seul : chaque pas est un snapshot JSON écrit à la
+    suite dans le fichier de données, et un enregistrement de taille fixe
+    (temps, offset, longueur) est ajouté à l'index.
+    """
+
+    def __init__(self, path, data_suffix=DATA_SUFFIX, index_suffix=INDEX_SUFFIX):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # "xb" : un journal existant n'est jamais complété par un autre lancement
+        self._data = open(self.path.with_suffix(data_suffix), "xb")
+        self._index = open(self.path.with_suffix(index_suffix), "xb")
+
+    def append(self, sim_time, snapshot):
+        payload = json.dumps(snapshot, separators=(",", ":")).encode("utf-8")
+        offset = self._data.tell()
+
+        # Les données sont écrites avant l'index : un lecteur qui suit le
+        # fichier ne voit jamais un pas indexé dont le contenu manque.
+        self._data.write(payload)
+        self._data.flush()
+        self._index.write(INDEX_RECORD.pack(sim_time, offset, len(payload)))
+        self._index.flush()
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+
+class StepLogReader:
+    """
+    Lecture d'un journal de pas via mmap. L'accès au pas i est en O(1) :
+    son enregistrement d'index se trouve à i * INDEX_RECORD.size.
+    """
+
+    def __init__(self, path, data_suffix=DATA_SUFFIX, index_suffix=INDEX_SUFFIX):
+        self.path = Path(path)
+        self._data_file = open(self.path.with_suffix(data_suffix), "rb")
+        self._index_file = open(self.path.with_suffix(index_suffix), "rb")
+        self._data = None
+        self._index = None
+        self._count = 0
+        # Les maps sont remplacées quand le journal grandit : lectures et
+        # re-mapping ne doivent pas se croiser entre threads de requêtes
+        self._lock = threading.RLock()
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-mappe les fichiers s'ils ont grandi (journal encore en cours d'écriture).
+        """
+        with self._lock:
+            index_size = os.fstat(self._index_file.fileno()).st_size
+            count = index_size // INDEX_RECORD.size
+            if count == self._count and self._index is not None:
+                return
+
+            self._close_maps()
+            if count:
+                self._index = mmap.mmap(self._index_file.fileno(), count * INDEX_RECORD.size,
+                                        access=mmap.ACCESS_READ)
+                self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def get_record(self, step):
+        with self._lock:
+            if not 0 <= step < self._count:
+                raise IndexError(f"Pas {step} hors du journal (0..{self._count - 1})")
+            return INDEX_RECORD.unpack_from(self._index, step * INDEX_RECORD.size)
+
+    def get_time(self, step):
+        return self.get_record(step)[0]
+
+    def get_snapshot(self, step):
+        with self._lock:
+            sim_time, offset, length = self.get_record(step)
+            payload = self._data[offset:offset + length]
+        return sim_time, json.loads(payload)
+
+    def times(self):
+        """
+        Vue séquence des temps simulés, utilisable avec bisect sans copie.
+        """
+        return _TimeView(self)
+
+    def _close_maps(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+    def close(self):
+        with self._lock:
+            self._close_maps()
+        self._data_file.close()
+        self._index_file.close()
+
+
+class _TimeView:
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __len__(self):
+        return len(self._reader)
+
+    def __getitem__(self, step):
+        return self._reader.get_time(step)
+
+
+class Replay:
+    """
+    Rejoue un enregistrement de simulation sans SUMO : renvoie les mêmes
+    données que Simulation.get_carrefour_data, à n'importe quelle vitesse.
+    """
+
+    def __init__(self, record_dir):
+        self.record_dir = Path(record_dir) if record_dir else None
+        self.name = None
+        self.log = None
+        self.vehicles_log = None
+
+        self.speed = 1.0
+        self.playing = False
+        self._anchor_step = 0
+        self._anchor_wall = 0.0
+
+        # dictionnaire handle -> id reconstruit au pas self._vehicles_step
+        self._vehicles = {}
+        self._vehicles_step = None
+
+    def list_recordings(self):
+        if self.record_dir is None or not self.record_dir.is_dir():
+            return []
+        return sorted(p.stem for p in self.record_dir.glob(f"*{INDEX_SUFFIX}"))
+
+    def open(self, name):
+        if name not in self.list_recordings():
+            return {"error": f"Enregistrement '{name}' introuvable"}
+
+        if self.log:
+            self.log.close()
+        if self.vehicles_log:
+            self.vehicles_log.close()
+        path = self.record_dir / name
+        self.log = StepLogReader(path)
+        # enregistrements antérieurs au journal du registre : handles non résolus
+        self.vehicles_log = None
+        if path.with_suffix(VEHICLES_INDEX_SUFFIX).exists():
+            self.vehicles_log = StepLogReader(path, VEHICLES_DATA_SUFFIX, VEHICLES_INDEX_SUFFIX)
+        self.name = name
+        self.playing = False
+        self._anchor_step = 0
+        self._vehicles = {}
+        self._vehicles_step = None
+
+        return self.get_status()
+
+    def play(self, speed=None):
+        if self.log is None:
+            return {"replay": "inactive"}
+        self._anchor_step = self.current_step()
+        self._anchor_wall = time.monotonic()
+        if speed is not None:
+            self.speed = speed
+        self.playing = True
+
+        return self.get_status()
+
+    def pause(self):
+        if self.log is None:
+            return {"replay": "inactive"}
+        self._anchor_step = self.current_step()
+        self.playing = False
+
+        return self.get_status()
+
+    def seek(self, step):
+        if self.log is None:
+            return {"replay": "inactive"}
+        self.log.refresh()
+        self._anchor_step = max(0, min(step, len(self.log) - 1))
+        self._anchor_wall = time.monotonic()
+
+        return self.get_status()
+
+    def current_step(self):
+        """
+        Pas courant : le temps simulé avance de `speed` secondes par seconde
+        réelle depuis le dernier ancrage (play/seek).
+        """
+        if self.log is None or len(self.log) == 0:
+            return 0
+        if not self.playing:
+            return self._anchor_step
+
+        self.log.refresh()
+        elapsed = (time.monotonic() - self._anchor_wall) * self.speed
+        target_time = self.log.get_time(self._anchor_step) + elapsed
+        step = bisect.bisect_right(self.log.times(), target_time, lo=self._anchor_step) - 1
+
+        return max(self._anchor_step, min(step, len(self.log) - 1))
+
+    def get_status(self):
+        if self.log is None:
+            return {"replay": "inactive"}
+        step = self.current_step()
+        return {
+            "name": self.name,
+            "step": step,
+            "time": self.log.get_time(step) if len(self.log) else None,
+            "steps": len(self.log),
+            "speed": self.speed,
+            "playing": self.playing,
+        }
+
+    def get_etag(self):
+        if self.log is None or len(self.log) == 0:
+            return "replay-inactive"
+        return f"replay-{self.name}-{len(self.log)}-{self.current_step()}-{self.speed}-{int(self.playing)}"
+
+    def get_carrefour_data(self):
+        if self.log is None or len(self.log) == 0:
+            return {"replay": "inactive"}
+
+        step = self.current_step()
+        _, snapshot = self.log.get_snapshot(step)
+        # handles des lanes résolus par le dictionnaire complet de ce pas
+        snapshot["vehicles"] = {"full": True, "vehicles": self._vehicles_at(step)}
+        snapshot["replay"] = self.get_status()
+
+        return snapshot
+
+    def _vehicles_at(self, step):
+        """
+        Dictionnaire handle -> id au pas `step`, depuis le point de reprise
+        (dictionnaire complet) qui le précède, ou depuis le dernier pas
+        reconstruit s'il est plus proche : au plus VEHICLES_CHECKPOINT petits
+        enregistrements relus, quelle que soit la distance du saut.
+        """
+        if self.vehicles_log is None:
+            return {}
+        self.vehicles_log.refresh()
+        step = min(step, len(self.vehicles_log) - 1)
+        if step < 0:
+            return {}
+
+        checkpoint = step - step % VEHICLES_CHECKPOINT
+        if self._vehicles_step is not None and checkpoint <= self._vehicles_step <= step:
+            first = self._vehicles_step + 1
+        else:
+            first = checkpoint
+            self._vehicles = {}
+
+        for i in range(first, step + 1):
+            self._apply_vehicles(self.vehicles_log.get_snapshot(i)[1])
+        self._vehicles_step = step
+        return dict(self._vehicles)
+
+    def _apply_vehicles(self, frame):
+        if frame.get("full"):
+            # clés JSON : handles sérialisés en chaînes
+            self._vehicles = {int(handle): veh_id for handle, veh_id in frame.get("vehicles", {}).items()}
+            return
+        for handle, veh_id in frame.get("changes", []):
+            if veh_id is None:
+                self._vehicles.pop(handle, None)
+            else:
+                self._vehicles[handle] = veh_id
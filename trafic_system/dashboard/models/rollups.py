@@ -0,0 +1,207 @@
+import bisect
+import math
+import threading
+from array import array
+
+
+# Niveaux de la pyramide, en secondes simulées par bucket
+LEVELS = (1, 10, 60, 600)
+
+
+class RollupSeries:
+    """
+    Buckets fermés d'une série à un niveau, en colonnes (début, min, max,
+    somme, nombre) stockées en tableaux typés (8 octets par valeur, sans
+    objet Python par bucket), plus le bucket en cours de remplissage.
+    """
+
+    __slots__ = ("starts", "mins", "maxs", "sums", "counts", "open")
+
+    def __init__(self):
+        self.starts = array("d")
+        self.mins = array("d")
+        self.maxs = array("d")
+        self.sums = array("d")
+        self.counts = array("q")
+        self.open = None
+
+    def append(self, bucket):
+        start, vmin, vmax, vsum, count = bucket
+        self.starts.append(start)
+        self.mins.append(vmin)
+        self.maxs.append(vmax)
+        self.sums.append(vsum)
+        self.counts.append(count)
+
+    def trim(self, retention):
+        excess = len(self.starts) - retention
+        # suppression par blocs : coût amorti constant par bucket
+        if excess > retention // 8:
+            for column in (self.starts, self.mins, self.maxs, self.sums, self.counts):
+                del column[:excess]
+
+
+def _bucket_start(time, size):
+    return math.floor(time / size) * size
+
+
+def _merge(bucket, vmin, vmax, vsum, count):
+    if vmin < bucket[1]:
+        bucket[1] = vmin
+    if vmax > bucket[2]:
+        bucket[2] = vmax
+    bucket[3] += vsum
+    bucket[4] += count
+
+
+class RollupPyramid:
+    """
+    Historique multi-résolution de séries (métriques par lane et par
+    approche) : chaque valeur alimente le niveau le plus fin, et chaque
+    bucket fermé est fusionné dans le niveau supérieur (1 s -> 10 s ->
+    1 min -> 10 min). Min, max, moyenne et nombre sont conservés à chaque
+    niveau, en mémoire bornée : `retention` buckets par série au niveau le
+    plus fin, moitié moins à chaque niveau supérieur (qui couvre tout de
+    même une durée plus longue).
+    """
+
+    def __init__(self, levels=LEVELS, retention=21600):
+        self.levels = tuple(levels)
+        self.retention = retention
+        self.retentions = tuple(max(retention >> i, 1) for i in range(len(self.levels)))
+        self.start_time = None
+        self.time = None
+
+        # clé de série -> [RollupSeries par niveau]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    #============================
+    # Alimentation
+    #============================
+
+    def add(self, time, values):
+        """
+        :param values: {clé de série: valeur} au temps simulé `time`
+        """
+        with self._lock:
+            if self.start_time is None:
+                self.start_time = time
+            self.time = time
+
+            for key, value in values.items():
+                if value is None:
+                    continue
+                levels = self._series.get(key)
+                if levels is None:
+                    levels = self._series[key] = [RollupSeries() for _ in self.levels]
+                self._add_bucket(levels, 0, time, value, value, value, 1)
+
+    def _add_bucket(self, levels, i, time, vmin, vmax, vsum, count):
+        series = levels[i]
+        start = _bucket_start(time, self.levels[i])
+
+        if series.open is not None and series.open[0] != start:
+            self._close(levels, i)
+        if series.open is None:
+            series.open = [start, vmin, vmax, vsum, count]
+        else:
+            _merge(series.open, vmin, vmax, vsum, count)
+
+    def _close(self, levels, i):
+        series = levels[i]
+        bucket = series.open
+        series.open = None
+        series.append(bucket)
+        series.trim(self.retentions[i])
+
+        if i + 1 < len(levels):
+            self._add_bucket(levels, i + 1, *bucket)
+
+    #============================
+    # Lecture
+    #============================
+
+    def keys(self):
+        with self._lock:
+            return list(self._series)
+
+    def choose_level(self, span, max_points, levels=None, start=None):
+        """
+        Niveau le plus fin dont le nombre de buckets sur `span` secondes tient
+        dans `max_points` (à défaut, le plus grossier). Avec les niveaux d'une
+        série et le début demandé, un niveau dont la rétention a déjà supprimé
+        les buckets de `start` est sauté : un niveau plus grossier couvre
+        toute la période.
+        """
+        for i, size in enumerate(self.levels):
+            if span // size + 1 > max_points:
+                continue
+            if levels is not None and start is not None and self._oldest(levels, i) > _bucket_start(start, size):
+                continue
+            return i
+        return len(self.levels) - 1
+
+    def _oldest(self, levels, i):
+        """
+        Début du plus ancien bucket encore disponible au niveau i : son premier
+        bucket fermé, ou le début du lancement s'il n'en a pas encore fermé
+        (ses buckets en cours couvrent alors tout depuis le début).
+        """
+        series = levels[i]
+        if series.starts:
+            return series.starts[0]
+        return _bucket_start(self.start_time, self.levels[i])
+
+    def query(self, key, start=None, end=None, max_points=500):
+        """
+        Buckets d'une série sur [start, end], au niveau choisi pour ne pas
+        dépasser `max_points` points, en colonnes :
+        {"level": 10, "t": [...], "min": [...], "max": [...], "mean": [...], "count": [...]}
+        """
+        with self._lock:
+            levels = self._series.get(key)
+            if levels is None:
+                return None
+
+            start = self.start_time if start is None else start
+            end = self.time if end is None else end
+            i = self.choose_level(max(end - start, 0), max(max_points, 1), levels, start)
+            size = self.levels[i]
+            series = levels[i]
+
+            lo = bisect.bisect_left(series.starts, _bucket_start(start, size))
+            hi = bisect.bisect_right(series.starts, end)
+            buckets = [
+                (series.starts[k], series.mins[k], series.maxs[k], series.sums[k], series.counts[k])
+                for k in range(lo, hi)
+            ]
+            buckets += [b for b in self._pending(levels, i) if start - size < b[0] <= end]
+
+        return {
+            "level": size,
+            "t": [b[0] for b in buckets],
+            "min": [b[1] for b in buckets],
+            "max": [b[2] for b in buckets],
+            "mean": [b[3] / b[4] for b in buckets],
+            "count": [b[4] for b in buckets],
+        }
+
+    def _pending(self, levels, i):
+        """
+        Buckets en cours du niveau i : son bucket ouvert, complété par les
+        buckets ouverts des niveaux plus fins, pas encore remontés.
+        """
+        size = self.levels[i]
+        pending = {}
+        for series in levels[:i + 1]:
+            if series.open is None:
+                continue
+            start, vmin, vmax, vsum, count = series.open
+            key = _bucket_start(start, size)
+            bucket = pending.get(key)
+            if bucket is None:
+                pending[key] = [key, vmin, vmax, vsum, count]
+            else:
+                _merge(bucket, vmin, vmax, vsum, count)
+        return sorted(pending.values())
@@ -0,0 +1,86 @@
+from .network import load_network, net_file_from_config
+
+
+_CATALOGUE_CACHE = {}
+
+
+class RouteCatalogue:
+    """
+    Catalogue des routes calculé une fois à partir de la topologie du réseau :
+    un mouvement par couple edge entrant -> edge sortant relié par une
+    connexion (tout droit et tourne-à-gauche/droite).
+
+    Les routes sont nommées <origine>2<destination> d'après les noeuds aux
+    extrémités (ex: "N2S" pour N2C -> C2S).
+    """
+
+    def __init__(self, network, vclass="passenger", turnarounds=False):
+        self.network = network
+        self.vclass = vclass
+        self.routes = {}
+
+        self._build(turnarounds)
+
+    @classmethod
+    def from_config(cls, sumo_cfg, vclass="passenger", turnarounds=False):
+        network = load_network(net_file_from_config(sumo_cfg))
+        key = (network.digest, vclass, turnarounds)
+
+        catalogue = _CATALOGUE_CACHE.get(key)
+        if catalogue is None:
+            catalogue = cls(network, vclass, turnarounds)
+            _CATALOGUE_CACHE[key] = catalogue
+        return catalogue
+
+    def _build(self, turnarounds):
+        net = self.network
+        movements = set()
+
+        for conn in net.connections:
+            from_edge, to_edge = conn["from"], conn["to"]
+            if net.is_internal(from_edge) or net.is_internal(to_edge):
+                continue
+            if conn["dir"] == "t" and not turnarounds:
+                continue
+
+            from_lane = net.edges[from_edge]["lanes"][conn["from_lane"]]
+            to_lane = net.edges[to_edge]["lanes"][conn["to_lane"]]
+            if not (net.lane_allows(from_lane, self.vclass) and net.lane_allows(to_lane, self.vclass)):
+                continue
+
+            movements.add((from_edge, to_edge, conn["dir"]))
+
+        for from_edge, to_edge, direction in sorted(movements):
+            origin = net.edges[from_edge]["from"]
+            destination = net.edges[to_edge]["to"]
+
+            route_id = f"{origin}2{destination}"
+            if route_id in self.routes:
+                route_id = f"{from_edge}_{to_edge}"
+
+            self.routes[route_id] = {
+                "id": route_id,
+                "edges": [from_edge, to_edge],
+                "origin": origin,
+                "destination": destination,
+                "dir": direction,
+            }
+
+    def get_edges(self, route_id):
+        route = self.routes.get(route_id)
+        return list(route["edges"]) if route else []
+
+    def find(self, origin, destination):
+        """
+        Retourne l'id de la route reliant deux noeuds extrémités, ou None.
+        """
+        for route in self.routes.values():
+            if route["origin"] == origin and route["destination"] == destination:
+                return route["id"]
+        return None
+
+    def ids(self):
+        return list(self.routes)
+
+    def serialize(self):
+        return {route_id: dict(route) for route_id, route in self.routes.items()}
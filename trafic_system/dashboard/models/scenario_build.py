@@ -0,0 +1,209 @@
+import hashlib
+import itertools
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+
+NET_FILE = "scenario.net.xml"
+
+# Options netconvert par défaut : proches du réseau édité à la main
+# (trottoirs et passages piétons, pas de demi-tours, coordonnées conservées)
+DEFAULT_OPTIONS = [
+    "--sidewalks.guess", "true",
+    "--crossings.guess", "true",
+    "--no-turnarounds", "true",
+    "--offset.disable-normalization", "true",
+]
+
+
+class ScenarioVariant:
+    """
+    Paramètres d'une variante du carrefour. None = valeur des fichiers d'origine.
+
+    :param lanes: nombre de voies de chaque edge
+    :param approach_length: distance (m) entre le carrefour et les extrémités
+    :param tls_type: type de feu (static, actuated, delay_based)
+    """
+
+    __slots__ = ("lanes", "approach_length", "tls_type")
+
+    def __init__(self, lanes=None, approach_length=None, tls_type=None):
+        self.lanes = lanes
+        self.approach_length = approach_length
+        self.tls_type = tls_type
+
+    @property
+    def name(self):
+        parts = []
+        if self.lanes is not None:
+            parts.append(f"l{self.lanes}")
+        if self.approach_length is not None:
+            parts.append(f"a{self.approach_length:g}")
+        if self.tls_type is not None:
+            parts.append(self.tls_type)
+        return "_".join(parts) or "base"
+
+    def to_dict(self):
+        return {
+            "lanes": self.lanes,
+            "approach_length": self.approach_length,
+            "tls_type": self.tls_type,
+        }
+
+    @classmethod
+    def grid(cls, lanes=(None,), approach_lengths=(None,), tls_types=(None,)):
+        """
+        Toutes les combinaisons des valeurs données.
+        """
+        return [cls(*values) for values in itertools.product(lanes, approach_lengths, tls_types)]
+
+
+@lru_cache(maxsize=None)
+def netconvert_version(netconvert):
+    result = subprocess.run([netconvert, "--version"], capture_output=True, text=True, check=True)
+    return result.stdout.splitlines()[0] if result.stdout else ""
+
+
+class ScenarioBuilder:
+    """
+    Construit des réseaux avec netconvert depuis des fichiers de noeuds,
+    d'edges (et éventuellement de types / connexions), avec un cache
+    indexé par empreinte du contenu : une variante déjà construite est
+    renvoyée immédiatement, sans relancer netconvert.
+    """
+
+    def __init__(self, nodes, edges, cache_dir, types=None, connections=None,
+                 netconvert="netconvert", options=None):
+        self.nodes = Path(nodes)
+        self.edges = Path(edges)
+        self.types = Path(types) if types else None
+        self.connections = Path(connections) if connections else None
+        self.cache_dir = Path(cache_dir)
+        self.netconvert = netconvert
+        self.options = list(DEFAULT_OPTIONS if options is None else options)
+
+    #============================
+    # Entrées d'une variante
+    #============================
+
+    def render(self, variant):
+        """
+        Fichiers d'entrée de la variante : {nom de fichier: contenu}.
+        """
+        nodes = ET.parse(self.nodes).getroot()
+        edges = ET.parse(self.edges).getroot()
+
+        if variant.approach_length is not None:
+            self._set_approach_length(nodes, variant.approach_length)
+        if variant.tls_type is not None:
+            for node in nodes.iter("node"):
+                if node.get("type") == "traffic_light":
+                    node.set("tlType", variant.tls_type)
+        if variant.lanes is not None:
+            for edge in edges.iter("edge"):
+                edge.set("numLanes", str(variant.lanes))
+
+        files = {
+            "nodes.nod.xml": ET.tostring(nodes, encoding="utf-8"),
+            "edges.edg.xml": ET.tostring(edges, encoding="utf-8"),
+        }
+        if self.types:
+            files["types.typ.xml"] = self.types.read_bytes()
+        if self.connections:
+            files["connections.con.xml"] = self.connections.read_bytes()
+        return files
+
+    def _set_approach_length(self, nodes, length):
+        """
+        Place chaque extrémité à `length` mètres du carrefour à feux,
+        dans la même direction qu'à l'origine.
+        """
+        centers = [n for n in nodes.iter("node") if n.get("type") == "traffic_light"]
+        if not centers:
+            return
+        cx, cy = float(centers[0].get("x")), float(centers[0].get("y"))
+
+        for node in nodes.iter("node"):
+            if node in centers:
+                continue
+            dx, dy = float(node.get("x")) - cx, float(node.get("y")) - cy
+            distance = math.hypot(dx, dy)
+            if distance:
+                node.set("x", f"{cx + dx * length / distance:g}")
+                node.set("y", f"{cy + dy * length / distance:g}")
+
+    def digest(self, variant, files=None):
+        files = files if files is not None else self.render(variant)
+        sha = hashlib.sha1()
+        sha.update(netconvert_version(self.netconvert).encode("utf-8"))
+        sha.update("\0".join(self.options).encode("utf-8"))
+        for name in sorted(files):
+            sha.update(name.encode("utf-8"))
+            sha.update(files[name])
+        return sha.hexdigest()
+
+    #============================
+    # Construction
+    #============================
+
+    def path(self, variant):
+        """
+        Chemin du réseau de la variante dans le cache (construit ou non).
+        """
+        return self.cache_dir / self.digest(variant) / NET_FILE
+
+    def build(self, variant):
+        """
+        Retourne (chemin du .net.xml, True si déjà en cache).
+        """
+        files = self.render(variant)
+        target = self.cache_dir / self.digest(variant, files)
+        if (target / NET_FILE).exists():
+            return target / NET_FILE, True
+
+        # Construction dans un dossier temporaire puis renommage atomique :
+        # un dossier présent dans le cache est toujours complet.
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        work = Path(tempfile.mkdtemp(prefix=".build-", dir=self.cache_dir))
+        try:
+            for name, content in files.items():
+                (work / name).write_bytes(content)
+            (work / "variant.json").write_text(json.dumps(variant.to_dict()))
+
+            command = [self.netconvert, "-n", "nodes.nod.xml", "-e", "edges.edg.xml"]
+            if "types.typ.xml" in files:
+                command += ["-t", "types.typ.xml"]
+            if "connections.con.xml" in files:
+                command += ["-x", "connections.con.xml"]
+            command += self.options + ["-o", NET_FILE]
+            subprocess.run(command, cwd=work, capture_output=True, text=True, check=True)
+
+            try:
+                os.replace(work, target)
+            except OSError:
+                # Construit en parallèle par un autre processus entre-temps
+                if not (target / NET_FILE).exists():
+                    raise
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+        return target / NET_FILE, False
+
+    def build_all(self, variants, jobs=None):
+        """
+        Construit les variantes en parallèle (un netconvert par coeur).
+
+        :return: liste de (variante, chemin, en cache) dans l'ordre donné
+        """
+        jobs = jobs or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(self.build, variants))
+        return [(variant, path, cached) for variant, (path, cached) in zip(variants, results)]
@@ -0,0 +1,228 @@
+import heapq
+import itertools
+import threading
+from collections import deque
+
+import traci
+
+
+# Actions planifiables -> paramètres obligatoires
+ACTIONS = {
+    "stop_all": (),
+    "restore": (),
+    "prioritize_lane": ("lane",),
+    "prioritize_direction": ("directions",),
+    "phase_duration": ("index", "duration"),
+    "switch_program": ("program",),
+}
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check(action, params, traffic_light=None, program_id=None):
+    """
+    Vérifie une action avant de la planifier : paramètres présents et bien
+    typés, puis, avec le feu, valeurs acceptées par celui-ci (index de lane,
+    directions, index et durée de phase, programme existant).
+
+    :param program_id: programme qui sera actif à l'exécution (None = l'actuel),
+                       pour vérifier une durée de phase
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Action inconnue : {action}")
+    missing = [p for p in ACTIONS[action] if p not in params]
+    if missing:
+        raise ValueError(f"Action '{action}' : paramètres manquants {', '.join(missing)}")
+
+    if action == "prioritize_lane":
+        if not _is_int(params["lane"]):
+            raise ValueError("Action 'prioritize_lane' : 'lane' doit être un entier")
+        if traffic_light is not None and not 0 <= params["lane"] < traffic_light.lane_count():
+            raise ValueError(f"Action 'prioritize_lane' : lane {params['lane']} invalide "
+                             f"(max {traffic_light.lane_count() - 1})")
+    elif action == "prioritize_direction":
+        directions = params["directions"]
+        if not isinstance(directions, str) or not directions:
+            raise ValueError("Action 'prioritize_direction' : 'directions' doit être une chaîne non vide")
+        if traffic_light is not None:
+            unknown = set(directions.upper()) - traffic_light.directions()
+            if unknown:
+                raise ValueError(f"Action 'prioritize_direction' : directions inconnues {''.join(sorted(unknown))}")
+    elif action == "phase_duration":
+        if not _is_int(params["index"]) or not _is_number(params["duration"]):
+            raise ValueError("Action 'phase_duration' : 'index' entier et 'duration' numérique attendus")
+        if traffic_light is not None:
+            traffic_light.check_phase_duration(params["index"], params["duration"], program_id)
+    elif action == "switch_program":
+        if not isinstance(params["program"], str):
+            raise ValueError("Action 'switch_program' : 'program' doit être une chaîne")
+        if traffic_light is not None and params["program"] not in traffic_light.program_ids():
+            raise ValueError(f"Action 'switch_program' : programme '{params['program']}' inconnu")
+
+
+class ControlScheduler:
+    """
+    File d'actions sur le feu, datées en temps simulé (tas trié par temps).
+    La boucle de pas exécute les actions échues juste après chaque pas :
+    le minutage ne dépend ni des requêtes HTTP ni de la vitesse de simulation.
+    """
+
+    def __init__(self, history=100):
+        self._heap = []
+        self._entries = {}
+        self._ids = itertools.count(1)
+        self.executed = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    #============================
+    # Planification
+    #============================
+
+    def schedule(self, time, action, params=None, traffic_light=None):
+        """
+        :param time: temps simulé d'exécution (s)
+        :param action: nom d'action (voir ACTIONS)
+        :param params: paramètres de l'action
+        :param traffic_light: feu contre lequel valider les paramètres
+        :return: identifiant de l'action planifiée
+        """
+        params = dict(params or {})
+        _check(action, params, traffic_light)
+        return self._push(time, action, params)
+
+    def _push(self, time, action, params):
+        with self._lock:
+            entry_id = next(self._ids)
+            entry = [float(time), entry_id, action, params]
+            self._entries[entry_id] = entry
+            heapq.heappush(self._heap, entry)
+        return entry_id
+
+    def schedule_plan(self, now, actions, traffic_light=None):
+        """
+        Planifie une chronologie : chaque action donne soit un temps absolu
+        "time", soit un décalage "at" (s) par rapport à `now`.
+        Ex: [{"at": 0, "action": "prioritize_direction", "directions": "NS"},
+             {"at": 60, "action": "restore"}]
+        Rien n'est planifié si une action est invalide : toutes sont validées
+        (contre `traffic_light` s'il est donné) avant la première insertion.
+        """
+        plan = []
+        for i, item in enumerate(actions):
+            if not isinstance(item, dict) or "action" not in item:
+                raise ValueError(f"Action {i} invalide : 'action' requis")
+            params = {k: v for k, v in item.items() if k not in ("action", "at", "time")}
+            for key in ("time", "at"):
+                if key in item and not _is_number(item[key]):
+                    raise ValueError(f"Action {i} : '{key}' doit être un nombre")
+            time = float(item["time"]) if "time" in item else now + float(item.get("at", 0))
+            plan.append((time, i, item["action"], params))
+
+        # dans l'ordre d'exécution : une durée de phase se vérifie sur le
+        # programme activé par un "switch_program" antérieur du même plan
+        program_id = None
+        for time, i, action, params in sorted(plan, key=lambda p: (p[0], p[1])):
+            try:
+                _check(action, params, traffic_light, program_id)
+            except ValueError as e:
+                raise ValueError(f"{e} (action {i})")
+            if action == "switch_program":
+                program_id = params["program"]
+            elif action == "restore":
+                # restore_controle revient au programme "0"
+                program_id = "0"
+
+        return [self._push(time, action, params) for time, i, action, params in plan]
+
+    def cancel(self, entry_id):
+        with self._lock:
+            entry = self._entries.pop(entry_id, None)
+            if entry is None:
+                return False
+            # suppression paresseuse : l'entrée est ignorée en sortie de tas
+            entry[2] = None
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._entries.clear()
+
+    #============================
+    # Exécution
+    #============================
+
+    def next_time(self):
+        """
+        Temps de la prochaine action planifiée (None si la file est vide).
+        """
+        with self._lock:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+
+    def run_due(self, now, traffic_light):
+        """
+        Exécute, dans l'ordre, les actions dont le temps est atteint.
+        """
+        while True:
+            with self._lock:
+                self._drop_cancelled()
+                if not self._heap or self._heap[0][0] > now:
+                    return
+                time, entry_id, action, params = heapq.heappop(self._heap)
+                del self._entries[entry_id]
+
+            error = None
+            try:
+                self._apply(traffic_light, action, params)
+            except (ValueError, traci.exceptions.TraCIException) as e:
+                print("Erreur action planifiée :", e)
+                error = str(e)
+
+            with self._lock:
+                self.executed.append({
+                    "id": entry_id,
+                    "time": time,
+                    "executed_at": now,
+                    "action": action,
+                    **params,
+                    "error": error,
+                })
+
+    def _apply(self, tl, action, params):
+        if action == "stop_all":
+            tl.stop_all()
+        elif action == "restore":
+            tl.restore_controle()
+        elif action == "prioritize_lane":
+            tl.prioritize_lane(int(params["lane"]))
+        elif action == "prioritize_direction":
+            tl.prioritize_lane_by_direction(params["directions"])
+        elif action == "phase_duration":
+            tl.set_phase_duration(int(params["index"]), float(params["duration"]))
+        elif action == "switch_program":
+            tl.switch_program(params["program"])
+
+    def pending(self):
+        with self._lock:
+            entries = sorted(e for e in self._heap if e[2] is not None)
+        return [{"id": entry_id, "time": time, "action": action, **params}
+                for time, entry_id, action, params in entries]
+
+    def history(self):
+        """
+        Dernières actions exécutées, copiées sous verrou (la boucle de pas
+        peut en ajouter pendant une requête).
+        """
+        with self._lock:
+            return list(self.executed)
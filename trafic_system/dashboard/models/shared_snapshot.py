@@ -0,0 +1,158 @@
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+
+# En-tête du segment : séquence, identifiant du lancement, version des données, longueur
+HEADER = struct.Struct("<QQQI")
+SEQUENCE = struct.Struct("<Q")
+
+# Essais d'un lecteur qui tombe sur une écriture en cours : les premiers
+# immédiats, les suivants après une courte pause (au total quelques dizaines de ms)
+READ_RETRIES = 100
+READ_SPINS = 10
+READ_BACKOFF = 0.0005
+
+# Segments POSIX nommés (Linux) : permet de voir qu'un nom a été recréé
+SHM_DIR = "/dev/shm"
+
+
+class SnapshotBusy(RuntimeError):
+    """
+    Aucun snapshot cohérent lisible : écritures continues pendant tous les
+    essais, et aucune lecture réussie à servir à la place.
+    """
+
+
+class SnapshotPublisher:
+    """
+    Publie le snapshot de chaque pas (JSON déjà sérialisé) dans un segment
+    de mémoire partagée de taille fixe, lisible par tous les processus
+    du serveur web sans verrou (seqlock).
+
+    La séquence est impaire pendant une écriture, paire sinon : un lecteur
+    qui lit la même séquence paire avant et après sa copie a une copie cohérente.
+    """
+
+    def __init__(self, name, capacity=4 * 1024 * 1024):
+        self.capacity = capacity
+        size = HEADER.size + capacity
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Segment laissé par un lancement précédent interrompu
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self._seq = 0
+        self._run = int.from_bytes(os.urandom(8), "little")
+        HEADER.pack_into(self._shm.buf, 0, self._seq, self._run, 0, 0)
+
+    def publish(self, version, payload):
+        """
+        :param version: version des données (sert d'ETag aux lecteurs)
+        :param payload: snapshot sérialisé (bytes)
+        """
+        if len(payload) > self.capacity:
+            print(f"Snapshot de {len(payload)} octets trop grand pour la mémoire partagée ({self.capacity})")
+            return False
+
+        buf = self._shm.buf
+        SEQUENCE.pack_into(buf, 0, self._seq + 1)
+        buf[HEADER.size:HEADER.size + len(payload)] = payload
+        HEADER.pack_into(buf, 0, self._seq + 1, self._run, version, len(payload))
+        self._seq += 2
+        SEQUENCE.pack_into(buf, 0, self._seq)
+        return True
+
+    def close(self):
+        # Longueur nulle : les lecteurs encore attachés voient la fin du lancement
+        buf = self._shm.buf
+        SEQUENCE.pack_into(buf, 0, self._seq + 1)
+        HEADER.pack_into(buf, 0, self._seq + 1, self._run, 0, 0)
+        SEQUENCE.pack_into(buf, 0, self._seq + 2)
+
+        self._shm.close()
+        self._shm.unlink()
+
+
+class SnapshotReader:
+    """
+    Lecture du dernier snapshot publié par le processus propriétaire de SUMO.
+    Le dernier snapshot lu avec succès est gardé : un lecteur qui ne trouve
+    pas de copie cohérente (écritures trop rapprochées) sert celui-là.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._shm = None
+        self._inode = None
+        self._last = None
+
+    def _path(self):
+        return os.path.join(SHM_DIR, self.name.lstrip("/"))
+
+    def _segment_inode(self):
+        try:
+            return os.stat(self._path()).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _attach(self):
+        # inode relevé avant l'ouverture : si le nom est recréé entre les deux,
+        # la lecture suivante voit un inode différent et se rattache
+        inode = self._segment_inode()
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return False
+        self._inode = inode
+        # Le segment appartient au publieur : ne pas le supprimer à la sortie du lecteur
+        resource_tracker.unregister("/" + self._shm.name.lstrip("/"), "shared_memory")
+        return True
+
+    def _detach(self):
+        self._shm.close()
+        self._shm = None
+        self._inode = None
+        self._last = None
+
+    def read(self, with_payload=True):
+        """
+        :return: (lancement, version, snapshot) ou None si rien n'est publié
+        :raises SnapshotBusy: aucune copie cohérente et aucun snapshot précédent
+        """
+        if self._shm is not None and self._segment_inode() != self._inode:
+            # segment supprimé, ou supprimé puis recréé par un nouveau lancement
+            self._detach()
+        if self._shm is None and not self._attach():
+            return None
+
+        buf = self._shm.buf
+        for attempt in range(READ_RETRIES):
+            if attempt >= READ_SPINS:
+                time.sleep(READ_BACKOFF)
+            seq = SEQUENCE.unpack_from(buf, 0)[0]
+            if seq & 1:
+                continue
+            _, run, version, length = HEADER.unpack_from(buf, 0)
+            payload = bytes(buf[HEADER.size:HEADER.size + length]) if with_payload else None
+            if SEQUENCE.unpack_from(buf, 0)[0] != seq:
+                continue
+
+            if length == 0:
+                # lancement terminé (ou pas encore de pas publié)
+                if seq:
+                    self._detach()
+                self._last = None
+                return None
+            if with_payload:
+                self._last = (run, version, payload)
+            return run, version, payload
+
+        if self._last is not None:
+            return self._last
+        raise SnapshotBusy(f"Snapshot '{self.name}' en cours d'écriture")
@@ -0,0 +1,103 @@
+from functools import lru_cache
+
+
+DIRECTIONS = ("N", "S", "E", "W")
+
+
+class StatePlanes:
+    """
+    Chaîne d'état d'un feu encodée en plans de bits : le bit i de `green`
+    vaut 1 si le signal i est vert (g/G), etc. Une direction se teste alors
+    en une seule opération sur son masque au lieu d'un parcours caractère
+    par caractère.
+    """
+
+    __slots__ = ("green", "yellow", "red", "valid")
+
+    def __init__(self, green, yellow, red, valid):
+        self.green = green
+        self.yellow = yellow
+        self.red = red
+        self.valid = valid
+
+
+@lru_cache(maxsize=1024)
+def encode_state(state):
+    green = yellow = red = 0
+    for i, signal in enumerate(state):
+        bit = 1 << i
+        if signal in "gG":
+            green |= bit
+        elif signal in "yY":
+            yellow |= bit
+        elif signal == "r":
+            red |= bit
+
+    return StatePlanes(green, yellow, red, (1 << len(state)) - 1)
+
+
+class DirectionMasks:
+    """
+    Masques par direction compilés une seule fois à partir des lanes
+    contrôlées par le feu (même classement que les noms de lanes : piétons,
+    puis N, S, E, W).
+    """
+
+    def __init__(self, controlled_lanes):
+        self.controlled_lanes = list(controlled_lanes)
+        self.vehicle = {direction: 0 for direction in DIRECTIONS}
+        self.pedestrian_indexes = []
+
+        for i, lane in enumerate(self.controlled_lanes):
+            lane_lower = lane.lower()
+            if "ped" in lane_lower or lane.startswith(":"):
+                self.pedestrian_indexes.append(i)
+            elif "n" in lane_lower:
+                self.vehicle["N"] |= 1 << i
+            elif "s" in lane_lower:
+                self.vehicle["S"] |= 1 << i
+            elif "e" in lane_lower:
+                self.vehicle["E"] |= 1 << i
+            elif "w" in lane_lower:
+                self.vehicle["W"] |= 1 << i
+
+    def current_signals(self, state):
+        """
+        Signal agrégé par direction pour l'état courant :
+        'g' si au moins un vert, sinon 'y' si au moins un jaune, sinon 'r'.
+        """
+        planes = encode_state(state)
+        signals = {}
+        for direction, mask in self.vehicle.items():
+            if planes.green & mask:
+                signals[direction] = "g"
+            elif planes.yellow & mask:
+                signals[direction] = "y"
+            else:
+                signals[direction] = "r"
+        return signals
+
+    def phase_signals(self, state):
+        """
+        Signal agrégé par direction pour une phase :
+        'g' si tout est vert, 'r' si tout est rouge, 'y' si au moins un jaune, sinon 'r'.
+        """
+        planes = encode_state(state)
+        signals = {}
+        for direction, mask in self.vehicle.items():
+            mask &= planes.valid
+            if mask and planes.green & mask == mask:
+                signals[direction] = "g"
+            elif mask and planes.red & mask == mask:
+                signals[direction] = "r"
+            elif planes.yellow & mask:
+                signals[direction] = "y"
+            else:
+                signals[direction] = "r"
+        return signals
+
+    def pedestrian_signals(self, state):
+        return [state[i] for i in self.pedestrian_indexes if i < len(state)]
+
+    def pedestrian_signals_by_lane(self, state):
+        return {self.controlled_lanes[i]: state[i] for i in self.pedestrian_indexes if i < len(state)}
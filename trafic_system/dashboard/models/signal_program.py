@@ -0,0 +1,180 @@
+import traci
+
+
+# Lettres d'état acceptées par SUMO (pas de "R" : refusé par setProgramLogic)
+VALID_SIGNALS = set("ryYgGsuoO")
+
+TL_TYPES = {
+    "static": 0,
+    "actuated": 1,
+    "delay_based": 2,
+    "external": 3,
+    "nema": 4,
+    "swarm": 5,
+    "rail_signal": 6,
+}
+
+
+class ProgramError(ValueError):
+    """
+    Programme de feu invalide (phase, état ou durées incohérents).
+    """
+
+
+def _is_int(value):
+    # bool est un int en Python : true/false JSON ne sont pas des index
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class PhaseSpec:
+    __slots__ = ("duration", "state", "min_dur", "max_dur")
+
+    def __init__(self, duration, state, min_dur=None, max_dur=None):
+        self.duration = float(duration)
+        self.state = state
+        self.min_dur = float(min_dur) if min_dur is not None else None
+        self.max_dur = float(max_dur) if max_dur is not None else None
+
+    def to_dict(self):
+        return {
+            "duration": self.duration,
+            "state": self.state,
+            "minDur": self.min_dur,
+            "maxDur": self.max_dur,
+        }
+
+
+class SignalProgram:
+    """
+    Modèle local d'un programme de feu : édité et validé en Python, puis
+    appliqué à SUMO en une seule fois.
+    """
+
+    def __init__(self, program_id, phases, tl_type=0, current_phase=0):
+        self.program_id = str(program_id)
+        self.phases = list(phases)
+        self.tl_type = tl_type
+        self.current_phase = current_phase
+
+    #============================
+    # Conversions
+    #============================
+
+    @classmethod
+    def from_logic(cls, logic):
+        phases = [
+            PhaseSpec(
+                phase.duration,
+                phase.state,
+                getattr(phase, "minDur", None),
+                getattr(phase, "maxDur", None),
+            )
+            for phase in logic.phases
+        ]
+        return cls(logic.programID, phases, logic.type, getattr(logic, "currentPhaseIndex", 0))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Construit un programme depuis le JSON de l'API :
+        {"programID": "...", "type": "static", "currentPhaseIndex": 0,
+         "phases": [{"duration": 30, "state": "GGrr", "minDur": 10, "maxDur": 60}, ...]}
+        """
+        if not isinstance(data, dict):
+            raise ProgramError("Le programme doit être un objet JSON")
+
+        program_id = data.get("programID", "custom")
+        if not isinstance(program_id, str) or not program_id:
+            raise ProgramError("'programID' doit être une chaîne non vide")
+
+        tl_type = data.get("type", "static")
+        if isinstance(tl_type, str):
+            if tl_type not in TL_TYPES:
+                raise ProgramError(f"Type de feu inconnu : {tl_type}")
+            tl_type = TL_TYPES[tl_type]
+        elif not _is_int(tl_type) or tl_type not in TL_TYPES.values():
+            raise ProgramError(f"Type de feu inconnu : {tl_type}")
+
+        current_phase = data.get("currentPhaseIndex", 0)
+        if not _is_int(current_phase):
+            raise ProgramError("'currentPhaseIndex' doit être un entier")
+
+        raw_phases = data.get("phases") or []
+        if not isinstance(raw_phases, list):
+            raise ProgramError("'phases' doit être une liste")
+
+        phases = []
+        for i, phase in enumerate(raw_phases):
+            if not isinstance(phase, dict) or "duration" not in phase or "state" not in phase:
+                raise ProgramError(f"Phase {i} invalide : 'duration' et 'state' sont requis")
+            if not isinstance(phase["state"], str):
+                raise ProgramError(f"Phase {i} : 'state' doit être une chaîne")
+            for key in ("duration", "minDur", "maxDur"):
+                value = phase.get(key)
+                if value is not None and not _is_number(value):
+                    raise ProgramError(f"Phase {i} : '{key}' doit être un nombre")
+            phases.append(PhaseSpec(phase["duration"], phase["state"], phase.get("minDur"), phase.get("maxDur")))
+
+        return cls(program_id, phases, tl_type, current_phase)
+
+    def to_logic(self):
+        phases = [
+            traci.trafficlight.Phase(
+                duration=phase.duration,
+                state=phase.state,
+                minDur=phase.min_dur if phase.min_dur is not None else phase.duration,
+                maxDur=phase.max_dur if phase.max_dur is not None else phase.duration,
+            )
+            for phase in self.phases
+        ]
+        return traci.trafficlight.Logic(self.program_id, self.tl_type, self.current_phase, phases)
+
+    def to_dict(self):
+        return {
+            "programID": self.program_id,
+            "type": self.tl_type,
+            "currentPhaseIndex": self.current_phase,
+            "phases": [phase.to_dict() for phase in self.phases],
+        }
+
+    #============================
+    # Validation et édition
+    #============================
+
+    def validate(self, num_links):
+        """
+        :param num_links: nombre de liens contrôlés par le feu (longueur des états)
+        """
+        if not self.phases:
+            raise ProgramError("Le programme doit contenir au moins une phase")
+        if not 0 <= self.current_phase < len(self.phases):
+            raise ProgramError(f"Phase courante {self.current_phase} invalide (max {len(self.phases) - 1})")
+
+        for i, phase in enumerate(self.phases):
+            if len(phase.state) != num_links:
+                raise ProgramError(f"Phase {i} : l'état doit contenir {num_links} signaux")
+            invalid = set(phase.state) - VALID_SIGNALS
+            if invalid:
+                raise ProgramError(f"Phase {i} : signaux inconnus {''.join(sorted(invalid))}")
+            if phase.duration <= 0:
+                raise ProgramError(f"Phase {i} : la durée doit être positive")
+            if phase.min_dur is not None and phase.max_dur is not None:
+                if not phase.min_dur <= phase.duration <= phase.max_dur:
+                    raise ProgramError(f"Phase {i} : il faut minDur <= duration <= maxDur")
+
+    def with_phase_duration(self, index, duration):
+        if not 0 <= index < len(self.phases):
+            raise ProgramError(f"Index {index} invalide (max {len(self.phases) - 1})")
+
+        phases = list(self.phases)
+        phase = phases[index]
+        min_dur, max_dur = phase.min_dur, phase.max_dur
+        if min_dur == max_dur == phase.duration:
+            # phase fixe (minDur = maxDur = duration) : les bornes suivent la durée
+            min_dur = max_dur = None
+        phases[index] = PhaseSpec(duration, phase.state, min_dur, max_dur)
+        return SignalProgram(self.program_id, phases, self.tl_type, self.current_phase)
@@ -1,15 +1,71 @@
+import json
+import os
 import traci
 import threading
 import time
+from datetime import datetime
+from pathlib import Path
 from .carrefour import Carrefour
+from .detectors import DetectorLayer
+from .geometry import geometry_payload
+from .kpi import KpiAggregator
+from .network import config_digest, load_network, net_file_from_config
+from .pedestrians import PedestrianLayer
+from .replay import VEHICLES_CHECKPOINT, VEHICLES_DATA_SUFFIX, VEHICLES_INDEX_SUFFIX, StepLogWriter
+from .rollups import RollupPyramid
+from .routes import RouteCatalogue
+from .scheduler import ControlScheduler
+from .shared_snapshot import SnapshotBusy, SnapshotPublisher, SnapshotReader
+from .signal_program import ProgramError, SignalProgram
+from .sumo_outputs import output_args
 from .vehicle import Vehicle
 
+# Métriques conservées dans l'historique multi-résolution
+HISTORY_LANE_METRICS = ("vehicles", "queue", "occupancy", "mean_speed")
+HISTORY_APPROACH_METRICS = ("vehicles", "queue", "jam_length")
+
+
 class Simulation:
-    def __init__(self, sumo_cfg):
+    def __init__(self, sumo_cfg, record_dir=None, sumo_binary="sumo-gui", sumo_args=None, output_dir=None,
+                 shared_snapshot=None, shared_snapshot_size=4 * 1024 * 1024):
         self.sumo_cfg = sumo_cfg
+        self.sumo_binary = sumo_binary
+        self.sumo_args = list(sumo_args or [])
         self.carrefour = None
+        self.detectors = None
+        self.pedestrians = None
+        self.kpi = None
+        self.history = None
         self.running = False
 
+        # Sérialise les appels TraCI entre la boucle de pas et les requêtes HTTP
+        self._step_lock = threading.RLock()
+
+        # Dossier d'enregistrement des pas (None = pas d'enregistrement)
+        self.record_dir = record_dir
+        self._recorder = None
+        self._vehicles_recorder = None
+
+        # Dossier des sorties natives SUMO (None = sorties désactivées)
+        self.output_dir = output_dir
+
+        # Segment de mémoire partagée où le processus qui pilote SUMO publie
+        # chaque pas, lu par les autres processus du serveur (None = désactivé)
+        self.shared_snapshot = shared_snapshot
+        self.shared_snapshot_size = shared_snapshot_size
+        self._publisher = None
+        self._snapshot_reader = SnapshotReader(shared_snapshot) if shared_snapshot else None
+
+        # Actions sur le feu planifiées en temps simulé, exécutées par la boucle de pas
+        self.scheduler = ControlScheduler()
+
+        # Version des données dynamiques (ETag) : change à chaque pas ou commande
+        self._run_id = None
+        self._version = 0
+
+        # Données statiques en cache, par empreinte des fichiers du scénario
+        self._static_cache = None
+
     def start_simulation(self):
         if self.running:
             # Simulation déjà lancée
@@ -28,7 +84,44 @@ class Simulation:
         self.running = True
         threading.Thread(target=self._run_sumo_gui).start()
 
+    def get_static_etag(self):
+        return config_digest(self.sumo_cfg)
+
+    def get_data_etag(self):
+        if not self.running and self._snapshot_reader is not None:
+            try:
+                published = self._snapshot_reader.read(with_payload=False)
+            except SnapshotBusy:
+                # pas d'ETag : la vue relit le segment (et répond 503 au besoin)
+                return None
+            if published is not None:
+                return f"shm-{published[0]:x}-{published[1]}"
+        if not self.running or not self.carrefour:
+            return "inactive"
+        return f"{self._run_id}-{self._version}"
+
+    def get_shared_snapshot(self):
+        """
+        Dernier snapshot (JSON déjà sérialisé) publié par le processus qui
+        pilote SUMO, pour les processus qui ne le pilotent pas. None sinon.
+
+        :raises SnapshotBusy: segment en cours d'écriture, sans snapshot précédent
+        """
+        if self.running or self._snapshot_reader is None:
+            return None
+        published = self._snapshot_reader.read()
+        return published[2] if published is not None else None
+
+    def _bump_version(self):
+        self._version += 1
+
     def get_carrefour_static_data(self):
+        digest = self.get_static_etag()
+        if self._static_cache is None or self._static_cache[0] != digest:
+            self._static_cache = (digest, self._load_carrefour_static_data())
+        return self._static_cache[1]
+
+    def _load_carrefour_static_data(self):
         # Démarrer SUMO en mode non graphique (pour le serveur web)
         traci.start(["sumo", "-c", self.sumo_cfg])
         
@@ -56,78 +149,441 @@ class Simulation:
             "pedestrian_lanes_info": pedestrian_lanes_info,
             "vehicles_by_lanes": vehicles_per_lanes,
             "traffic_light_info": tl_state,
+            "geometry": geometry_payload(self.get_network()),
         }
 
     def _run_sumo_gui(self):
         try:
-            traci.start(["sumo-gui", "-c", self.sumo_cfg])
+            self._run_id = self._run_name()
+            traci.start([self.sumo_binary, "-c", self.sumo_cfg] + self.sumo_args + self._output_args())
+            self.scheduler.clear()
             self.carrefour = Carrefour()
+            self.detectors = DetectorLayer(self.get_network())
+            self.detectors.subscribe()
+            self.pedestrians = PedestrianLayer(self.get_network())
+            self.pedestrians.subscribe()
+            self.kpi = KpiAggregator(self.get_network(), self.detectors)
+            self.history = RollupPyramid()
+            self._open_recorder()
+            if self.shared_snapshot:
+                self._publisher = SnapshotPublisher(self.shared_snapshot, self.shared_snapshot_size)
 
             while self.running:
-                traci.simulationStep()
+                with self._step_lock:
+                    traci.simulationStep()
+                    self._on_step()
                 time.sleep(0.1)
 
         except traci.exceptions.FatalTraCIError:
             print("SUMO GUI fermé, arrêt de la simulation.")
         finally:
             self.running = False
+            self._close_recorder()
+            if self._publisher is not None:
+                self._publisher.close()
+                self._publisher = None
             try:
                 traci.close()
             except:
                 pass
 
+    def _on_step(self, jumped=False):
+        """
+        Traitements exécutés après chaque pas de simulation.
+
+        :param jumped: le pas couvre plusieurs pas SUMO (run_until) : registre
+                       et KPI sont réalignés sur les véhicules présents
+        """
+        self._bump_version()
+        if self.scheduler.next_time() is not None:
+            self.scheduler.run_due(traci.simulation.getTime(), self.carrefour.TL)
+        self.carrefour.vehicles.on_step()
+        self.kpi.on_step()
+        if jumped:
+            self.carrefour.vehicles.sync()
+            self.kpi.sync()
+        self._record_history()
+        self._record_step()
+
+    def _run_name(self):
+        # suffixe unique : deux lancements dans la même seconde ne partagent
+        # jamais un journal ni un dossier de sorties
+        return datetime.now().strftime("run_%Y%m%d_%H%M%S_%f") + f"_{os.getpid()}"
+
+    def _output_args(self):
+        if self.output_dir is None:
+            return []
+        return output_args(Path(self.output_dir) / self._run_id)
+
+    def _open_recorder(self):
+        if self.record_dir is None:
+            return
+        path = Path(self.record_dir) / self._run_id
+        self._recorder = StepLogWriter(path)
+        self._vehicles_recorder = StepLogWriter(path, VEHICLES_DATA_SUFFIX, VEHICLES_INDEX_SUFFIX)
+        self._recorded_steps = 0
+        self._recorded_version = None
+
+    def _record_step(self):
+        if self._recorder is None and self._publisher is None:
+            return
+        data = self.get_carrefour_data()
+        if self._recorder is not None:
+            # les handles des lanes ne sont rejouables qu'avec le registre :
+            # ses changements (ou le dictionnaire complet aux points de reprise)
+            # vont dans un journal parallèle, après get_carrefour_data qui peut en créer
+            since = None if self._recorded_steps % VEHICLES_CHECKPOINT == 0 else self._recorded_version
+            vehicles = self.carrefour.vehicles.get_changes(since)
+            sim_time = traci.simulation.getTime()
+            self._vehicles_recorder.append(sim_time, vehicles)
+            self._recorder.append(sim_time, data)
+            self._recorded_steps += 1
+            self._recorded_version = vehicles["version"]
+        if self._publisher is not None:
+            self._publisher.publish(self._version, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def _record_history(self):
+        values = {}
+        if self.detectors:
+            data = self.detectors.read()
+            for lane, metrics in data["lanes"].items():
+                for metric in HISTORY_LANE_METRICS:
+                    values[("lane", lane, metric)] = metrics.get(metric)
+            for approach, metrics in data["approaches"].items():
+                if approach is None:
+                    continue
+                for metric in HISTORY_APPROACH_METRICS:
+                    values[("approach", approach, metric)] = metrics.get(metric)
+        if self.pedestrians:
+            for crossing, metrics in self.pedestrians.read()["crossings"].items():
+                values[("crossing", crossing, "waiting")] = metrics["waiting"]
+                values[("crossing", crossing, "persons")] = metrics["persons"]
+        self.history.add(traci.simulation.getTime(), values)
+
+    def _close_recorder(self):
+        if self._recorder is not None:
+            self._recorder.close()
+            self._vehicles_recorder.close()
+            self._recorder = None
+            self._vehicles_recorder = None
+
     def stop_simulation(self):
         self.running = False
 
     def get_carrefour_data(self):
-        if self.running:
-            if self.carrefour:
-                return {
-                    "edges_info": {e: self.carrefour.get_edge_info(e) for e in self.carrefour.edges},
-                    "lanes_info": {e: self.carrefour.get_lane_info(e) for e in self.carrefour.lanes},
-                    "pedestrian_lanes_info": self.carrefour.get_pedestrian_lanes_info(),
-                    "vehicles_by_lanes": self.carrefour.get_vehicle_counts_by_lane()
+        with self._step_lock:
+            if self.running:
+                if self.carrefour:
+                    # lanes entrantes : mesures des abonnements E2, pas de requête par lane
+                    measures = self.detectors.lane_measures() if self.detectors else {}
+                    pedestrians = self.pedestrians.read() if self.pedestrians else {}
+                    return {
+                        "edges_info": {e: self.carrefour.get_edge_info(e) for e in self.carrefour.edges},
+                        "lanes_info": {e: self.carrefour.get_lane_info(e, measures) for e in self.carrefour.lanes},
+                        "pedestrian_lanes_info": self.carrefour.get_pedestrian_lanes_info(pedestrians),
+                        "vehicles_by_lanes": self.carrefour.get_vehicle_counts_by_lane()
 ,
-                    "traffic_light_info": self.carrefour.TL.get_info(),
-                }
+                        "traffic_light_info": self.carrefour.TL.get_info(measures),
+                        "detectors": self.detectors.read() if self.detectors else {},
+                        "pedestrians": pedestrians,
+                        "vehicles_version": self.carrefour.vehicles.version,
+                    }
         return {
             "sumo": "inactive"
         }
 
+    #============================
+    # Avance rapide
+    #============================
+
+    def fast_forward(self, seconds):
+        """
+        Avance la simulation de `seconds` secondes simulées d'un seul coup.
+        """
+        if not self.running or not self.carrefour:
+            return {"sumo": "inactive"}
+        with self._step_lock:
+            target = traci.simulation.getTime() + seconds
+        return self.run_until(target)
+
+    def run_until(self, target_time=None, approach=None, queue=None, horizon=3600, check_interval=5):
+        """
+        Avance jusqu'au temps `target_time`, ou jusqu'à ce que la file sur
+        `approach` (N, S, E, W) dépasse `queue` véhicules.
+
+        Sans condition, SUMO exécute tous les pas en un seul appel
+        traci.simulationStep(target_time). Avec une condition, la file est
+        vérifiée tous les `check_interval` secondes simulées, au plus pendant
+        `horizon` secondes. Les traitements par pas (historique,
+        enregistrement) ne voient que le dernier pas de chaque saut ; registre
+        et KPI sont réalignés sur les véhicules présents après chaque saut. Les sauts s'arrêtent aux
+        temps des actions planifiées, qui sont donc exécutées à l'heure.
+        """
+        if not self.running or not self.carrefour:
+            return {"sumo": "inactive"}
+
+        condition_met = False
+        try:
+            with self._step_lock:
+                now = traci.simulation.getTime()
+                if target_time is None:
+                    target_time = now + horizon
+
+                if approach is None or queue is None:
+                    while now < target_time:
+                        now = self._jump_target(target_time)
+                        traci.simulationStep(now)
+                        self._on_step(jumped=True)
+                        now = traci.simulation.getTime()
+                else:
+                    condition_met = self._queue_exceeds(approach, queue)
+                    while not condition_met and now < target_time:
+                        now = self._jump_target(min(now + check_interval, target_time))
+                        traci.simulationStep(now)
+                        self._on_step(jumped=True)
+                        condition_met = self._queue_exceeds(approach, queue)
+
+                reached_time = traci.simulation.getTime()
+        except traci.exceptions.FatalTraCIError:
+            # Fin du scénario atteinte pendant le saut
+            self.running = False
+            return {"sumo": "inactive"}
+
+        data = self.get_carrefour_data()
+        data["run_until"] = {
+            "time": reached_time,
+            "target_time": target_time,
+            "condition_met": condition_met,
+        }
+        return data
+
+    def _jump_target(self, target_time):
+        """
+        Fin du prochain saut : `target_time`, ou avant si une action est planifiée.
+        """
+        next_action = self.scheduler.next_time()
+        if next_action is not None and next_action < target_time:
+            return next_action
+        return target_time
+
+    #============================
+    # Planification
+    #============================
+
+    def schedule(self, actions):
+        """
+        Planifie une chronologie d'actions sur le feu (voir
+        ControlScheduler.schedule_plan), exécutées par la boucle de pas.
+        """
+        if not self.running or not self.carrefour:
+            return {"sumo": "inactive"}
+        try:
+            with self._step_lock:
+                now = traci.simulation.getTime()
+                ids = self.scheduler.schedule_plan(now, actions, self.carrefour.TL)
+                # les actions déjà échues (ex: "at": 0) s'appliquent tout de suite
+                self.scheduler.run_due(now, self.carrefour.TL)
+        except ValueError as e:
+            return {"error": str(e)}
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
+
+        return {"scheduled": ids, **self.get_schedule()}
+
+    def get_schedule(self):
+        return {
+            "pending": self.scheduler.pending(),
+            "executed": self.scheduler.history(),
+        }
+
+    def cancel_scheduled(self, entry_id):
+        if not self.scheduler.cancel(entry_id):
+            return {"error": f"Action planifiée {entry_id} introuvable"}
+        return self.get_schedule()
+
+    def clear_schedule(self):
+        self.scheduler.clear()
+        return self.get_schedule()
+
+    def _queue_exceeds(self, approach, queue):
+        approaches = self.detectors.read()["approaches"] if self.detectors else {}
+        return approaches.get(approach, {}).get("queue", 0) > queue
+
+    def get_vehicle_ids(self, since=None):
+        if not self.carrefour:
+            return {
+                "sumo": "inactive"
+            }
+        return self.carrefour.vehicles.get_changes(since)
+
+    def get_kpi(self):
+        if self.kpi is None:
+            return {
+                "sumo": "inactive"
+            }
+        return self.kpi.snapshot()
+
+    def get_history(self, kind, key, start=None, end=None, max_points=500, metric=None):
+        """
+        Historique d'une lane, d'une approche ou d'un passage piéton, au
+        niveau de la pyramide le plus fin qui tient dans `max_points` points.
+        """
+        if self.history is None:
+            return {"sumo": "inactive"}
+
+        metrics = {}
+        for series_key in self.history.keys():
+            if series_key[:2] == (kind, key) and metric in (None, series_key[2]):
+                metrics[series_key[2]] = self.history.query(series_key, start, end, max_points)
+        if not metrics:
+            return {"error": f"Aucun historique pour {kind} '{key}'"}
+
+        return {"kind": kind, "key": key, "metrics": metrics}
+
+    def get_history_index(self):
+        if self.history is None:
+            return {"sumo": "inactive"}
+
+        index = {}
+        for kind, key, metric in self.history.keys():
+            index.setdefault(kind, {}).setdefault(key, []).append(metric)
+        return {
+            "levels": list(self.history.levels),
+            "start_time": self.history.start_time,
+            "time": self.history.time,
+            "series": index,
+        }
+
+    def get_detector_data(self):
+        if self.running and self.detectors:
+            with self._step_lock:
+                return self.detectors.read()
+        return {
+            "sumo": "inactive"
+        }
+
+    def get_pedestrian_data(self):
+        if self.running and self.pedestrians:
+            with self._step_lock:
+                return self.pedestrians.read()
+        return {
+            "sumo": "inactive"
+        }
     
     def stop_all_traffic_light(self):
-        new_state = ''.join(['r' if c in ['g', 'G', 'y'] else c for c in self.carrefour.TL.get_state()])
-        
-        self.carrefour.TL.set_state(new_state)
+        try:
+            with self._step_lock:
+                self.carrefour.TL.stop_all()
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
 
         return self.get_carrefour_data()
     
     def restore_controle_tl(self):
-        self.carrefour.TL.restore_controle()
+        try:
+            with self._step_lock:
+                self.carrefour.TL.restore_controle()
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
         
         return self.get_carrefour_data()
 
     def prioritize_lane(self, lane_index):
-        self.carrefour.TL.prioritize_lane(lane_index)
+        try:
+            with self._step_lock:
+                self.carrefour.TL.prioritize_lane(lane_index)
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
 
         return self.get_carrefour_data()
     
     def prioritize_lane_by_direction(self, direction):
-        self.carrefour.TL.prioritize_lane_by_direction(direction)
+        try:
+            with self._step_lock:
+                self.carrefour.TL.prioritize_lane_by_direction(direction)
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
 
         return self.get_carrefour_data()
     
 
 
     def change_phase_duration(self, index, duration):
-        self.carrefour.TL.set_phase_duration(index, duration)
+        try:
+            with self._step_lock:
+                self.carrefour.TL.set_phase_duration(index, duration)
+        except ProgramError as e:
+            return {"error": str(e)}
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
 
         return self.get_carrefour_data()
+
+    #============================
+    # Programmes de feux
+    #============================
+
+    def get_programs(self):
+        if not self.running or not self.carrefour:
+            return {"sumo": "inactive"}
+        with self._step_lock:
+            return self.carrefour.TL.get_programs()
+
+    def apply_program(self, data, activate=True):
+        """
+        Remplace un programme complet (phases, durées, états) en une seule
+        application, après validation locale.
+
+        :param data: programme au format JSON (voir SignalProgram.from_dict)
+        :param activate: False pour seulement stocker le programme sous son nom
+        """
+        if not self.running or not self.carrefour:
+            return {"sumo": "inactive"}
+        try:
+            program = SignalProgram.from_dict(data)
+            with self._step_lock:
+                result = self.carrefour.TL.apply_program(program, activate)
+        except ProgramError as e:
+            return {"error": str(e)}
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
+
+        return {"program": result}
+
+    def switch_program(self, program_id):
+        if not self.running or not self.carrefour:
+            return {"sumo": "inactive"}
+        try:
+            with self._step_lock:
+                result = self.carrefour.TL.switch_program(program_id)
+        except ProgramError as e:
+            return {"error": str(e), "unknown_program": program_id}
+        except traci.exceptions.TraCIException as e:
+            return {"error": f"Erreur TraCI : {e}"}
+        self._bump_version()
+
+        return {"program": result}
     
+    def get_network(self):
+        return load_network(net_file_from_config(self.sumo_cfg))
+
+    def get_routes(self):
+        return RouteCatalogue.from_config(self.sumo_cfg).serialize()
+
     def create_vehicle(self, vehID, routeID):
-        vehicle = Vehicle(vehID, routeID)
-        vehicle.create_vehicle()
+        vehicle = Vehicle(vehID, routeID, RouteCatalogue.from_config(self.sumo_cfg))
+        with self._step_lock:
+            vehicle.create_vehicle()
+            self._bump_version()
+            total = self.carrefour.get_total_vehicle_count()
 
         return {
-            "total_vehicle" : self.carrefour.get_total_vehicle_count()
+            "total_vehicle" : total
         }
\ No newline at end of file
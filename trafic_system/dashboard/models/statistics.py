@@ -0,0 +1,114 @@
+import math
+
+
+class RunningStats:
+    """
+    Statistiques en ligne (algorithme de Welford) : moyenne, variance, min et
+    max mis à jour valeur par valeur, en mémoire constante.
+    """
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "std": self.std if self.count else None,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+class P2Quantile:
+    """
+    Estimation en ligne d'un quantile (algorithme P² de Jain et Chlamtac) :
+    cinq marqueurs suffisent, quelle que soit la longueur de la série.
+    """
+
+    __slots__ = ("p", "_initial", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, p):
+        self.p = p
+        self._initial = []
+        self._heights = None
+        self._positions = None
+        self._desired = None
+        self._increments = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def add(self, value):
+        if self._heights is None:
+            self._initial.append(value)
+            if len(self._initial) == 5:
+                self._initial.sort()
+                self._heights = self._initial
+                self._positions = [0, 1, 2, 3, 4]
+                self._desired = [0.0, 2 * self.p, 4 * self.p, 2 + 2 * self.p, 4.0]
+            return
+
+        q, n = self._heights, self._positions
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if value < q[i]) - 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Ajustement des trois marqueurs centraux
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self):
+        if self._heights is not None:
+            return self._heights[2]
+        if not self._initial:
+            return None
+        ordered = sorted(self._initial)
+        return ordered[min(len(ordered) - 1, int(self.p * len(ordered)))]
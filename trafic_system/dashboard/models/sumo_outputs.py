@@ -0,0 +1,210 @@
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from .statistics import RunningStats
+
+
+# Sorties natives SUMO : type -> (option de ligne de commande, fichier)
+OUTPUTS = {
+    "tripinfo": ("--tripinfo-output", "tripinfo.xml"),
+    "summary": ("--summary-output", "summary.xml"),
+    "queue": ("--queue-output", "queue.xml"),
+    "fcd": ("--fcd-output", "fcd.xml"),
+}
+
+READ_CHUNK_SIZE = 1 << 20
+
+
+def output_args(output_dir, outputs=None):
+    """
+    Options SUMO activant les sorties demandées dans output_dir.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    args = []
+    for name in outputs or OUTPUTS:
+        option, filename = OUTPUTS[name]
+        args += [option, str(output_dir / filename)]
+    return args
+
+
+def iter_elements(path, follow=False, poll_interval=0.5, should_stop=None):
+    """
+    Parcourt en flux les éléments de premier niveau d'une sortie SUMO
+    (<tripinfo>, <step>, <data>, <timestep>...), avec leurs enfants.
+
+    Chaque élément est vidé après usage : la mémoire reste constante quelle
+    que soit la taille du fichier. Avec follow=True, le fichier est suivi
+    pendant son écriture (comme tail -f) jusqu'à la balise racine fermante.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                if not follow or (should_stop and should_stop()):
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = elem
+                    depth += 1
+                    continue
+
+                depth -= 1
+                if depth == 1:
+                    yield elem
+                    root.clear()
+                elif depth == 0:
+                    # Balise racine fermée : SUMO a fini d'écrire
+                    return
+
+
+def wait_for_file(path, poll_interval=0.5, should_stop=None):
+    path = Path(path)
+    while not path.exists() or path.stat().st_size == 0:
+        if should_stop and should_stop():
+            return False
+        time.sleep(poll_interval)
+    return True
+
+
+class OutputIngestor:
+    """
+    Agrège les sorties SUMO en statistiques par route et par approche
+    (N, S, E, W), en mémoire constante.
+    """
+
+    def __init__(self, network, route_catalogue):
+        self.network = network
+
+        # (edge de départ, edge d'arrivée) -> route du catalogue
+        self._routes = {
+            tuple(route["edges"]): route_id for route_id, route in route_catalogue.routes.items()
+        }
+        self._incoming_edges = {network.lanes[lane]["edge"] for lane in network.incoming_lanes()}
+
+        self.trips = {"routes": {}, "approaches": {}, "total": 0}
+        self.summary = {}
+        self.queues = {}
+        self.speeds = {}
+        self.fcd_samples = 0
+
+    #============================
+    # Ingestion
+    #============================
+
+    def ingest(self, kind, path, follow=False, should_stop=None):
+        fold = {
+            "tripinfo": self._fold_tripinfo,
+            "summary": self._fold_summary,
+            "queue": self._fold_queue,
+            "fcd": self._fold_fcd,
+        }[kind]
+
+        if follow and not wait_for_file(path, should_stop=should_stop):
+            return
+        for elem in iter_elements(path, follow=follow, should_stop=should_stop):
+            fold(elem)
+
+    def _edge_of_lane(self, lane_id):
+        lane = self.network.lanes.get(lane_id)
+        return lane["edge"] if lane else None
+
+    def _approach_of_lane(self, lane_id):
+        edge = self._edge_of_lane(lane_id)
+        if edge not in self._incoming_edges:
+            return None
+        return self.network.approach_of(edge)
+
+    def _fold_tripinfo(self, elem):
+        if elem.tag != "tripinfo":
+            return
+
+        depart_edge = self._edge_of_lane(elem.get("departLane"))
+        arrival_edge = self._edge_of_lane(elem.get("arrivalLane"))
+        route_id = self._routes.get((depart_edge, arrival_edge), f"{depart_edge}_{arrival_edge}")
+        # approche : seulement pour un départ sur un edge entrant (comme queue et fcd)
+        approach = self.network.approach_of(depart_edge) if depart_edge in self._incoming_edges else None
+
+        values = {
+            "duration": float(elem.get("duration", 0)),
+            "waiting_time": float(elem.get("waitingTime", 0)),
+            "time_loss": float(elem.get("timeLoss", 0)),
+        }
+        for group, key in ((self.trips["routes"], route_id), (self.trips["approaches"], approach)):
+            stats = group.setdefault(key, {name: RunningStats() for name in values})
+            for name, value in values.items():
+                stats[name].add(value)
+        self.trips["total"] += 1
+
+    def _fold_summary(self, elem):
+        if elem.tag != "step":
+            return
+
+        for name in ("running", "waiting", "halting", "meanSpeed", "meanWaitingTime", "meanTravelTime"):
+            value = elem.get(name)
+            if value is None:
+                continue
+            value = float(value)
+            # meanTravelTime vaut -1 tant qu'aucun véhicule n'est arrivé
+            if value < 0:
+                continue
+            self.summary.setdefault(name, RunningStats()).add(value)
+
+    def _fold_queue(self, elem):
+        if elem.tag != "data":
+            return
+
+        totals = {}
+        for lane in elem.iter("lane"):
+            approach = self._approach_of_lane(lane.get("id"))
+            if approach is None:
+                continue
+            totals[approach] = totals.get(approach, 0.0) + float(lane.get("queueing_length", 0))
+
+        for approach, length in totals.items():
+            self.queues.setdefault(approach, RunningStats()).add(length)
+
+    def _fold_fcd(self, elem):
+        if elem.tag != "timestep":
+            return
+
+        for vehicle in elem.iter("vehicle"):
+            self.fcd_samples += 1
+            approach = self._approach_of_lane(vehicle.get("lane"))
+            if approach is None:
+                continue
+            self.speeds.setdefault(approach, RunningStats()).add(float(vehicle.get("speed", 0)))
+
+    #============================
+    # Résultats
+    #============================
+
+    def snapshot(self):
+        return {
+            "trips": {
+                "total": self.trips["total"],
+                "routes": self._serialize_groups(self.trips["routes"]),
+                "approaches": self._serialize_groups(self.trips["approaches"]),
+            },
+            "summary": {name: stats.to_dict() for name, stats in self.summary.items()},
+            "queue_length_by_approach": {a: stats.to_dict() for a, stats in self.queues.items()},
+            "speed_by_approach": {a: stats.to_dict() for a, stats in self.speeds.items()},
+            "fcd_samples": self.fcd_samples,
+        }
+
+    def _serialize_groups(self, groups):
+        return {
+            str(key): {name: stats.to_dict() for name, stats in group.items()}
+            for key, group in groups.items()
+        }
@@ -1,14 +1,24 @@
 import traci
+from .signal_masks import DirectionMasks
+from .signal_program import ProgramError, SignalProgram
 
 class TrafficLight :
-    def __init__(self):
+    def __init__(self, vehicles=None):
+        """
+        :param vehicles: VehicleRegistry utilisé pour les véhicules par lane
+        """
         self._id = traci.trafficlight.getIDList()[0]
+        self._vehicles = vehicles
         
         self._controlled_lanes = traci.trafficlight.getControlledLanes(self._id)
+        # masques par direction compilés une fois pour toutes
+        self._masks = DirectionMasks(self._controlled_lanes)
         # normaliser la récupération du premier logic (accepte tuple ou objet)
         logics = traci.trafficlight.getCompleteRedYellowGreenDefinition(self._id)
         self._logic = logics[0] if logics else None
         self._phase = traci.trafficlight.getPhase(self._id)
+        # modèle local des programmes connus de SUMO (programID -> SignalProgram)
+        self._programs = {logic.programID: SignalProgram.from_logic(logic) for logic in logics}
 
         self._meanings_singal = {
             "r": "Rouge (interdiction totale)",
@@ -32,10 +42,10 @@ class TrafficLight :
         return traci.trafficlight.getRedYellowGreenState(self._id)
 
     def set_state(self, state):
-        try:
-            traci.trafficlight.setRedYellowGreenState(self._id, state)
-        except traci.exceptions.TraCIException as e:
-            print("Erreur TraCI :", e)
+        """
+        :raises TraCIException: état refusé par SUMO (l'appelant signale l'échec)
+        """
+        traci.trafficlight.setRedYellowGreenState(self._id, state)
 
 
 
@@ -45,19 +55,20 @@ class TrafficLight :
     #============================
     # TL controle
     #============================
+    # Les erreurs TraCI remontent à l'appelant (requête HTTP ou action
+    # planifiée), qui les signale au lieu d'un échec silencieux
+    def stop_all(self):
+        """
+        Passe au rouge tous les signaux verts ou jaunes.
+        """
+        self.set_state(''.join(['r' if c in ['g', 'G', 'y'] else c for c in self.get_state()]))
+
     def restore_controle(self):
-        try:
-            traci.trafficlight.setProgram(self._id, 0)
-        except traci.exceptions.TraCIException as e:
-            print("Erreur TraCI :", e)
+        traci.trafficlight.setProgram(self._id, 0)
     
     def prioritize_lane(self, lane_index):
         new_state = self._build_state_by_lane_index(lane_index)
-
-        try:
-            traci.trafficlight.setRedYellowGreenState(self._id, "".join(new_state))
-        except traci.exceptions.TraCIException as e:
-            print("Erreur TraCI :", e)
+        self.set_state("".join(new_state))
 
     def prioritize_lane_by_direction(self, directions):
         """
@@ -67,24 +78,36 @@ class TrafficLight :
         """
         new_state = self._build_state_by_direction(directions)
         
-        new_state_str = ''.join(new_state)
+        self.set_state(''.join(new_state))
 
-        try:
-            traci.trafficlight.setRedYellowGreenState(self._id, new_state_str)
-        except traci.exceptions.TraCIException as e:
-            print("Erreur TraCI :", e) 
 
 
 
 
+    def lane_count(self):
+        """
+        Nombre de signaux du feu (index valides pour prioritize_lane).
+        """
+        return len(self._controlled_lanes)
+
+    def directions(self):
+        """
+        Lettres de direction acceptées par prioritize_lane_by_direction :
+        initiales des lanes contrôlées.
+        """
+        return {lane[0].upper() for lane in self._controlled_lanes if lane[:1].isalpha()}
+
+
 
     #============================
     # Infos
     #=============================
 
-    def get_info(self):
+    def get_info(self, measures=None):
         """
         État complet du feu principal avec infos dynamiques pour chaque lane.
+
+        :param measures: mesures des détecteurs par lane (DetectorLayer.lane_measures)
         """
         current_time = traci.simulation.getTime()
         next_switch = traci.trafficlight.getNextSwitch(self._id)
@@ -101,7 +124,7 @@ class TrafficLight :
             "state": self.get_state(),
             "state_by_direction": self._get_signals_by_direction(),
             "type": self._get_type_name(self._logic.type),
-            "lanes": self._get_lanes_info(),
+            "lanes": self._get_lanes_info(measures or {}),
             "phases": self._logics_serialized()
         }
 
@@ -117,45 +140,95 @@ class TrafficLight :
 
         :param phase_index: index de la phase à modifier (0-based)
         :param new_duration: nouvelle durée en secondes
+        :raises ProgramError: index ou durée invalide (la simulation continue)
         """
+        program = self.get_program()
+        return self.apply_program(program.with_phase_duration(index_phase, new_duration))
 
-        try:
 
-            # Récupération du programme complet du feu
-            logics = traci.trafficlight.getCompleteRedYellowGreenDefinition(self._id)
-            logic = logics[0]
 
-            # Vérifie si l'index est valide
-            if index_phase >= len(logic.phases):
-                print(f"❌ Index {index_phase} invalide (max {len(logic.phases)-1})")
-                traci.close()
-                return
+    #==================================
+    # Programmes
+    #===================================
 
-            # Copie des phases et modification
-            phases = list(logic.phases)
-            phase_modifiee = phases[index_phase]
-            phases[index_phase] = traci.trafficlight.Phase(
-                duration=new_duration,
-                state=phase_modifiee.state,
-                minDur=getattr(phase_modifiee, "minDur", 0),
-                maxDur=getattr(phase_modifiee, "maxDur", 0)
-            )
+    def get_program(self, program_id=None):
+        """
+        Modèle local d'un programme (par défaut le programme actif, ou le
+        programme initial si le feu est piloté état par état).
+        """
+        if program_id is None:
+            program_id = traci.trafficlight.getProgram(self._id)
+            if program_id not in self._programs and self._logic is not None:
+                program_id = self._logic.programID
+        program = self._programs.get(program_id)
+        if program is None:
+            raise ProgramError(f"Programme '{program_id}' inconnu")
+        return program
+
+    def get_programs(self):
+        return {
+            "active": traci.trafficlight.getProgram(self._id),
+            "programs": [program.to_dict() for program in self._programs.values()],
+        }
 
-            # Création de la nouvelle logique avec la phase modifiée
-            new_logic = traci.trafficlight.Logic(
-                logic.programID, logic.type, logic.currentPhaseIndex, phases
-            )
+    def apply_program(self, program, activate=True):
+        """
+        Valide le programme localement puis l'envoie à SUMO en un seul appel.
+        Rien n'est envoyé si la validation échoue.
+
+        :param program: SignalProgram complet (phases, durées, états)
+        :param activate: active le programme, sinon il est seulement stocké
+        :raises ProgramError: programme invalide, ou stockage seul (activate=False)
+                              sous le nom du programme en cours, que SUMO
+                              remplacerait immédiatement
+        """
+        program.validate(len(self._controlled_lanes))
+
+        previous = traci.trafficlight.getProgram(self._id)
+        if not activate and program.program_id == previous:
+            raise ProgramError(f"Le programme '{previous}' est actif : il ne peut pas être seulement stocké")
+        logic = program.to_logic()
+        traci.trafficlight.setProgramLogic(self._id, logic)
+
+        active = traci.trafficlight.getProgram(self._id)
+        if activate and active != program.program_id:
+            traci.trafficlight.setProgram(self._id, program.program_id)
+        elif not activate and active != previous:
+            # un nouveau programme devient actif à l'ajout : on revient au précédent
+            traci.trafficlight.setProgram(self._id, previous)
+
+        self._programs[program.program_id] = program
+        if activate:
+            self._logic = logic
+            self._phase = program.current_phase
+
+        return program.to_dict()
+
+    def program_ids(self):
+        """
+        Programmes connus de SUMO pour ce feu.
+        """
+        return {logic.programID for logic in traci.trafficlight.getAllProgramLogics(self._id)}
+
+    def check_phase_duration(self, index_phase, new_duration, program_id=None):
+        """
+        Vérifie, sans rien envoyer à SUMO, qu'une durée de phase serait acceptée.
+
+        :raises ProgramError: index, durée ou bornes minDur/maxDur invalides
+        """
+        program = self.get_program(program_id)
+        program.with_phase_duration(index_phase, new_duration).validate(len(self._controlled_lanes))
 
-            # Application et rechargement du programme
-            traci.trafficlight.setCompleteRedYellowGreenDefinition(self._id, new_logic)
-            traci.trafficlight.setProgram(self._id, new_logic.programID)
+    def switch_program(self, program_id):
+        """
+        Bascule instantanément vers un programme déjà stocké.
+        """
+        program = self.get_program(program_id)
+        traci.trafficlight.setProgram(self._id, program.program_id)
+        self._logic = program.to_logic()
+        self._phase = traci.trafficlight.getPhase(self._id)
 
-        except traci.exceptions.TraCIException as e:
-            print("Erreur TraCI :", e)
-            return False
-        except Exception as e:
-            print("Erreur :", e)
-            return False
+        return program.to_dict()
 
 
 
@@ -168,41 +241,13 @@ class TrafficLight :
         :return: dict regroupant les états des feux par direction
         """
         state = self.get_state()
-        controlled_lanes = self._controlled_lanes
-
-        vehicle_directions = {"N": [], "S": [], "E": [], "W": []}
-        pedestrian_signals = []
-
-        for lane, signal in zip(controlled_lanes, state):
-            lane_lower = lane.lower()
-            if "ped" in lane_lower or lane.startswith(":"):
-                pedestrian_signals.append(signal)
-            elif "n" in lane_lower:
-                vehicle_directions["N"].append(signal)
-            elif "s" in lane_lower:
-                vehicle_directions["S"].append(signal)
-            elif "e" in lane_lower:
-                vehicle_directions["E"].append(signal)
-            elif "w" in lane_lower:
-                vehicle_directions["W"].append(signal)
-
-        aggregated_signals = {dir: self._aggregate(sigs) for dir, sigs in vehicle_directions.items()}
 
         return {
-            "vehicles": aggregated_signals,
-            "pedestrians": pedestrian_signals
+            "vehicles": self._masks.current_signals(state),
+            "pedestrians": self._masks.pedestrian_signals(state)
         }
 
 
-    def _aggregate(self, sig_list):
-        if any(s.lower() == 'g' for s in sig_list):
-            return 'g'
-        elif any(s.lower() == 'y' for s in sig_list):
-            return 'y'
-        else:
-            return 'r'
-
-
 
     #=================================
     # private method
@@ -261,7 +306,6 @@ class TrafficLight :
         Supporte les objets traci *et* les tuples (compatibilité versions).
         """
         logics = traci.trafficlight.getCompleteRedYellowGreenDefinition(self._id)
-        controlled_lanes = traci.trafficlight.getControlledLanes(self._id)
 
         logics_serialized = []
 
@@ -300,33 +344,9 @@ class TrafficLight :
                     minDur = phase[2] if len(phase) > 2 else None
                     maxDur = phase[3] if len(phase) > 3 else None
 
-                # Calcul des signaux par direction
-                vehicle_directions = {"N": [], "S": [], "E": [], "W": []}
-                pedestrian_lanes = {}
-
-                for lane, sig in zip(controlled_lanes, state):
-                    lane_lower = lane.lower()
-                    if "ped" in lane_lower or lane.startswith(":"):
-                        pedestrian_lanes[lane] = sig
-                    elif "n" in lane_lower:
-                        vehicle_directions["N"].append(sig)
-                    elif "s" in lane_lower:
-                        vehicle_directions["S"].append(sig)
-                    elif "e" in lane_lower:
-                        vehicle_directions["E"].append(sig)
-                    elif "w" in lane_lower:
-                        vehicle_directions["W"].append(sig)
-
-                global_signals = {}
-                for dirc, signals in vehicle_directions.items():
-                    if signals and all(s in ["g", "G"] for s in signals):
-                        global_signals[dirc] = "g"
-                    elif signals and all(s == "r" for s in signals):
-                        global_signals[dirc] = "r"
-                    elif any(s == "y" for s in signals):
-                        global_signals[dirc] = "y"
-                    else:
-                        global_signals[dirc] = "r"
+                # Calcul des signaux par direction (masques précompilés)
+                global_signals = self._masks.phase_signals(state)
+                pedestrian_lanes = self._masks.pedestrian_signals_by_lane(state)
 
                 logic_dict["phases"].append({
                     "duration": duration,
@@ -341,7 +361,7 @@ class TrafficLight :
 
         return logics_serialized
 
-    def _get_lanes_info(self):
+    def _get_lanes_info(self, measures):
         lanes_info = {}
 
         for i,(lane, sig) in enumerate(zip(self._controlled_lanes, self.get_state())):
@@ -356,15 +376,35 @@ class TrafficLight :
                 "direction": direction,
                 "signal": sig,
                 "meaning": self._meanings_singal.get(sig, f"Inconnu ({sig})"),
-                "num_vehicles": traci.lane.getLastStepVehicleNumber(lane),
-                "vehicle_ids": traci.lane.getLastStepVehicleIDs(lane),
-                "occupancy": traci.lane.getLastStepOccupancy(lane),
-                "mean_speed": traci.lane.getLastStepMeanSpeed(lane),
-                "waiting_time": traci.lane.getWaitingTime(lane)
+                **self._lane_measures(lane, measures),
             }
 
         return lanes_info
 
+    def _lane_measures(self, lane, measures):
+        # lanes équipées d'un E2 : valeurs de l'abonnement, sans requête par lane
+        measured = measures.get(lane)
+        if measured is not None:
+            return {
+                "num_vehicles": measured["num_vehicles"],
+                "vehicle_handles": self._vehicle_handles(measured["vehicle_ids"]),
+                "occupancy": measured["occupancy"],
+                "mean_speed": measured["mean_speed"],
+                "waiting_time": measured["waiting_time"],
+            }
+        return {
+            "num_vehicles": traci.lane.getLastStepVehicleNumber(lane),
+            "vehicle_handles": self._vehicle_handles(traci.lane.getLastStepVehicleIDs(lane)),
+            "occupancy": traci.lane.getLastStepOccupancy(lane),
+            "mean_speed": traci.lane.getLastStepMeanSpeed(lane),
+            "waiting_time": traci.lane.getWaitingTime(lane),
+        }
+
+    def _vehicle_handles(self, veh_ids):
+        if self._vehicles is None:
+            return list(veh_ids)
+        return self._vehicles.handles(veh_ids)
+
     def _get_lane_type(self, name):
         if "_w" in name or "ped" in name:
             return "pieton"
@@ -1,13 +1,15 @@
 import traci
 
 class Vehicle:
-    def __init__(self, vehID, routeID):
+    def __init__(self, vehID, routeID, route_catalogue=None):
         """
         :param vehID: identifiant du véhicule
         :param routeID: identifiant de la route
+        :param route_catalogue: RouteCatalogue utilisé pour créer les routes manquantes
         """
         self.vehID = vehID
         self.routeID = routeID
+        self.route_catalogue = route_catalogue
         self.typeID = "car"
 
         # Paramètres de départ/arrivée
@@ -33,14 +35,8 @@ class Vehicle:
         import traci
 
         # Créer la route si elle n'existe pas
-        if self.routeID not in traci.route.getIDList():
-            route_edges_map = {
-                "E2W": ["E2C", "C2W"],
-                "N2S": ["N2C", "C2S"],
-                "S2N": ["S2C", "C2N"],
-                "W2E": ["W2C", "C2E"]
-            }
-            edges = route_edges_map.get(self.routeID, [])
+        if self.routeID not in traci.route.getIDList() and self.route_catalogue:
+            edges = self.route_catalogue.get_edges(self.routeID)
             if edges:
                 traci.route.add(self.routeID, edges)
 
@@ -0,0 +1,113 @@
+import threading
+from collections import deque
+
+import traci
+
+
+class VehicleRegistry:
+    """
+    Registre des véhicules présents : chaque véhicule reçoit un entier
+    compact (handle) à son départ, libéré et réutilisé à son arrivée.
+
+    Les données par lane ne transportent que ces entiers ; le dictionnaire
+    handle -> id est envoyé séparément, par différences depuis une version.
+    """
+
+    def __init__(self, history=4096):
+        self._handles = {}
+        self._ids = []
+        self._free = []
+
+        # Journal borné des changements : (version, handle, id ou None si libéré)
+        self.version = 0
+        self._changes = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    #============================
+    # Mise à jour
+    #============================
+
+    def on_step(self):
+        """
+        À appeler après chaque pas : enregistre les départs, libère les arrivées.
+        """
+        departed = traci.simulation.getDepartedIDList()
+        arrived = traci.simulation.getArrivedIDList()
+        with self._lock:
+            for veh_id in departed:
+                self._add(veh_id)
+            for veh_id in arrived:
+                self._remove(veh_id)
+
+    def sync(self):
+        """
+        Réaligne le registre sur les véhicules présents (après un saut de
+        plusieurs pas, où les listes de départs/arrivées ne couvrent que le dernier pas).
+        """
+        present = set(traci.vehicle.getIDList())
+        with self._lock:
+            for veh_id in list(self._handles):
+                if veh_id not in present:
+                    self._remove(veh_id)
+            for veh_id in present:
+                self._add(veh_id)
+
+    def _add(self, veh_id):
+        handle = self._handles.get(veh_id)
+        if handle is not None:
+            return handle
+
+        if self._free:
+            handle = self._free.pop()
+            self._ids[handle] = veh_id
+        else:
+            handle = len(self._ids)
+            self._ids.append(veh_id)
+        self._handles[veh_id] = handle
+        self._log(handle, veh_id)
+        return handle
+
+    def _remove(self, veh_id):
+        handle = self._handles.pop(veh_id, None)
+        if handle is None:
+            return
+        self._ids[handle] = None
+        self._free.append(handle)
+        self._log(handle, None)
+
+    def _log(self, handle, veh_id):
+        self.version += 1
+        self._changes.append((self.version, handle, veh_id))
+
+    #============================
+    # Lecture
+    #============================
+
+    def handles(self, veh_ids):
+        """
+        Handles d'une liste d'ids ; un véhicule inconnu (présent avant la
+        création du registre) est enregistré à la volée.
+        """
+        with self._lock:
+            return [self._add(veh_id) for veh_id in veh_ids]
+
+    def get_changes(self, since=None):
+        """
+        Différences du dictionnaire handle -> id depuis la version `since`,
+        à appliquer dans l'ordre (id None = handle libéré). Si `since` est
+        trop ancien (ou absent), le dictionnaire complet est renvoyé.
+        """
+        with self._lock:
+            oldest = self._changes[0][0] if self._changes else self.version + 1
+            if since is None or since + 1 < oldest or since > self.version:
+                return {
+                    "version": self.version,
+                    "full": True,
+                    "vehicles": {handle: veh_id for handle, veh_id in enumerate(self._ids) if veh_id is not None},
+                }
+
+            return {
+                "version": self.version,
+                "full": False,
+                "changes": [[handle, veh_id] for version, handle, veh_id in self._changes if version > since],
+            }
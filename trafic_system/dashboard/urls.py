@@ -12,6 +12,36 @@ urlpatterns = [
     path('data/', 
         views.carrefour_data, name='carrefour_data'),
 
+    path('detectors/',
+        views.detector_data, name='detector_data'),
+
+    path('pedestrians/',
+        views.pedestrian_data, name='pedestrian_data'),
+
+    path('history/',
+        views.history_index, name='history_index'),
+
+    path('history/<str:kind>/<str:key>/',
+        views.history, name='history'),
+
+    path('vehicles/',
+        views.vehicle_ids, name='vehicle_ids'),
+
+    path('vehicles/<int:since>/',
+        views.vehicle_ids, name='vehicle_ids_since'),
+
+    path('kpi/',
+        views.kpi, name='kpi'),
+
+    path('simulation/fast_forward/<int:seconds>/',
+        views.fast_forward, name='fast_forward'),
+
+    path('simulation/run_until/<int:target_time>/',
+        views.run_until, name='run_until'),
+
+    path('simulation/run_until_queue/<str:direction>/<int:queue>/',
+        views.run_until_queue, name='run_until_queue'),
+
     path('traffic_light/stop_all',
         views.stop_all_tl, name='stop_all_traffic'),
 
@@ -29,8 +59,47 @@ urlpatterns = [
         name='change_phase_duration'
     ),
 
+    path('traffic_light/programs/',
+        views.programs, name='programs'),
+
+    path('traffic_light/program/',
+        views.apply_program, name='apply_program'),
+
+    path('traffic_light/programs/<str:program_id>/switch/',
+        views.switch_program, name='switch_program'),
+
+    path('traffic_light/schedule/',
+        views.schedule, name='schedule'),
+
+    path('traffic_light/schedule/cancel/<int:entry_id>/',
+        views.cancel_scheduled, name='cancel_scheduled'),
+
+    path('traffic_light/schedule/clear/',
+        views.clear_schedule, name='clear_schedule'),
+
+    path('routes/',
+        views.routes, name='routes'),
+
     path('vehicle/create/<str:vehicleID>/<str:routeID>/',
         views.create_vehicle,
         name='create_vehicle'
     ),
+
+    path('replay/',
+        views.replay_list, name='replay_list'),
+
+    path('replay/open/<str:name>/',
+        views.replay_open, name='replay_open'),
+
+    path('replay/play/<str:speed>/',
+        views.replay_play, name='replay_play'),
+
+    path('replay/pause/',
+        views.replay_pause, name='replay_pause'),
+
+    path('replay/seek/<int:step>/',
+        views.replay_seek, name='replay_seek'),
+
+    path('replay/data/',
+        views.replay_data, name='replay_data'),
 ]
\ No newline at end of file
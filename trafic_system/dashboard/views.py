@@ -1,12 +1,30 @@
 import json
+import math
 from django.shortcuts import render
-from django.http import JsonResponse
-from .models import Simulation
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from .models import Replay, Simulation
+from .models.shared_snapshot import SnapshotBusy
 from django.conf import settings
 
 # Crée une instance globale
-simulation = Simulation(settings.CONFIG_FILE_SIMULATION)
+simulation = Simulation(
+    settings.CONFIG_FILE_SIMULATION,
+    record_dir=settings.SIMULATION_RECORD_DIR if settings.SIMULATION_RECORD else None,
+    sumo_binary=settings.SUMO_BINARY,
+    sumo_args=settings.SUMO_EXTRA_ARGS,
+    output_dir=settings.SIMULATION_OUTPUT_DIR,
+    shared_snapshot=settings.SIMULATION_SHARED_SNAPSHOT,
+    shared_snapshot_size=settings.SIMULATION_SHARED_SNAPSHOT_SIZE,
+)
+replay = Replay(settings.SIMULATION_RECORD_DIR)
 
+# Les clients (et un éventuel proxy) revalident à chaque requête via l'ETag :
+# réponse 304 sans corps tant que les données n'ont pas changé.
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=lambda request: simulation.get_static_etag())
 def index(request):
     context = simulation.get_carrefour_static_data()
     return JsonResponse(context)
@@ -15,38 +33,205 @@ def start_simulation(request):
     simulation.start_simulation()
     return JsonResponse({"status": "started"})
 
+@cache_control(no_cache=True)
+@condition(etag_func=lambda request: simulation.get_data_etag())
 def carrefour_data(request):
+    # Autre processus que celui qui pilote SUMO : snapshot publié en mémoire partagée
+    try:
+        payload = simulation.get_shared_snapshot()
+    except SnapshotBusy as e:
+        return JsonResponse({"error": str(e)}, status=503)
+    if payload is not None:
+        return HttpResponse(payload, content_type="application/json")
+
     data = simulation.get_carrefour_data()
     return JsonResponse(data)
 
+def detector_data(request):
+    data = simulation.get_detector_data()
+    return JsonResponse(data)
+
+def pedestrian_data(request):
+    data = simulation.get_pedestrian_data()
+    return JsonResponse(data)
+
+def history_index(request):
+    return JsonResponse(simulation.get_history_index())
+
+def history(request, kind, key):
+    try:
+        start = float(request.GET["start"]) if "start" in request.GET else None
+        end = float(request.GET["end"]) if "end" in request.GET else None
+        points = int(request.GET.get("points", 500))
+    except ValueError:
+        return JsonResponse({"error": "Paramètres 'start', 'end' ou 'points' invalides"}, status=400)
+    if any(value is not None and not math.isfinite(value) for value in (start, end)):
+        return JsonResponse({"error": "Paramètres 'start' et 'end' doivent être finis"}, status=400)
+
+    result = simulation.get_history(kind, key, start, end, points, request.GET.get("metric"))
+    if "error" in result:
+        return JsonResponse(result, status=404)
+
+    return JsonResponse(result)
+
+def vehicle_ids(request, since=None):
+    data = simulation.get_vehicle_ids(since)
+    return JsonResponse(data)
+
+def kpi(request):
+    data = simulation.get_kpi()
+    return JsonResponse(data)
+
+def fast_forward(request, seconds):
+    if seconds <= 0:
+        return JsonResponse({"error": "Paramètre 'seconds' doit être positif"}, status=400)
+    result = simulation.fast_forward(seconds)
+
+    return JsonResponse(result)
+
+def run_until(request, target_time):
+    result = simulation.run_until(target_time)
+
+    return JsonResponse(result)
+
+def run_until_queue(request, direction, queue):
+    direction = direction.upper()
+    if direction not in ("N", "S", "E", "W"):
+        return JsonResponse({"error": "Paramètre 'direction' invalide (N, S, E ou W)"}, status=400)
+    result = simulation.run_until(approach=direction, queue=queue)
+
+    return JsonResponse(result)
+
 def stop_all_tl(request):
     data = simulation.stop_all_traffic_light()
+    if "error" in data:
+        return JsonResponse(data, status=400)
     return JsonResponse(data)
 
 def restore_controle_tl(request):
     data = simulation.restore_controle_tl()
+    if "error" in data:
+        return JsonResponse(data, status=400)
     return JsonResponse(data)
 
 def prioritize_lane(request, lane):
     if lane is None or lane == "":
         return JsonResponse({"error": "Paramètre 'lane' manquant"}, status=400)
     result = simulation.prioritize_lane(lane)
-    
+    if "error" in result:
+        return JsonResponse(result, status=400)
+
     return JsonResponse(result)
 
 def prioritize_lane_by_direction(request, direction):
     if direction is None or direction == "":
         return JsonResponse({"error": "Paramètre 'direction' manquant"}, status=400)
     result = simulation.prioritize_lane_by_direction(direction)
-    
+    if "error" in result:
+        return JsonResponse(result, status=400)
+
     return JsonResponse(result)
 
 def change_phase_duration(request, phase_index, duration):
     result = simulation.change_phase_duration(phase_index, duration)
+    if "error" in result:
+        return JsonResponse(result, status=400)
+
+    return JsonResponse(result)
+
+def programs(request):
+    return JsonResponse(simulation.get_programs())
+
+@csrf_exempt
+@require_POST
+def apply_program(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Corps JSON invalide"}, status=400)
+    result = simulation.apply_program(data, activate=request.GET.get("activate", "1") != "0")
+    if "error" in result:
+        return JsonResponse(result, status=400)
+
+    return JsonResponse(result)
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def schedule(request):
+    if request.method == "GET":
+        return JsonResponse(simulation.get_schedule())
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Corps JSON invalide"}, status=400)
+    actions = data.get("actions") if isinstance(data, dict) else data
+    if not isinstance(actions, list):
+        return JsonResponse({"error": "Liste 'actions' attendue"}, status=400)
+
+    result = simulation.schedule(actions)
+    if "error" in result:
+        return JsonResponse(result, status=400)
+
+    return JsonResponse(result)
+
+def cancel_scheduled(request, entry_id):
+    result = simulation.cancel_scheduled(entry_id)
+    if "error" in result:
+        return JsonResponse(result, status=404)
+
+    return JsonResponse(result)
+
+def clear_schedule(request):
+    return JsonResponse(simulation.clear_schedule())
+
+def switch_program(request, program_id):
+    result = simulation.switch_program(program_id)
+    if "error" in result:
+        return JsonResponse(result, status=404 if "unknown_program" in result else 400)
 
     return JsonResponse(result)
 
+def routes(request):
+    return JsonResponse(simulation.get_routes())
+
 def create_vehicle(request, vehicleID, routeID):
     result = simulation.create_vehicle(vehicleID, routeID)
 
-    return JsonResponse(result)
\ No newline at end of file
+    return JsonResponse(result)
+
+
+#============================
+# Replay
+#============================
+
+def replay_list(request):
+    return JsonResponse({"recordings": replay.list_recordings()})
+
+def replay_open(request, name):
+    result = replay.open(name)
+    if "error" in result:
+        return JsonResponse(result, status=404)
+
+    return JsonResponse(result)
+
+def replay_play(request, speed):
+    try:
+        speed = float(speed)
+    except ValueError:
+        return JsonResponse({"error": "Paramètre 'speed' invalide"}, status=400)
+    if speed <= 0:
+        return JsonResponse({"error": "Paramètre 'speed' doit être positif"}, status=400)
+
+    return JsonResponse(replay.play(speed))
+
+def replay_pause(request):
+    return JsonResponse(replay.pause())
+
+def replay_seek(request, step):
+    return JsonResponse(replay.seek(step))
+
+@cache_control(no_cache=True)
+@condition(etag_func=lambda request: replay.get_etag())
+def replay_data(request):
+    return JsonResponse(replay.get_carrefour_data())
\ No newline at end of file
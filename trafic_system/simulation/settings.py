@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import shlex
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -125,6 +127,30 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CONFIG_FILE_SIMULATION = "../carrefour4_netgenerate/carrefour.sumocfg"
 
+# Binaire SUMO de la simulation ("sumo" pour un lancement sans interface)
+SUMO_BINARY = os.environ.get("SUMO_BINARY", "sumo-gui")
+# Options SUMO supplémentaires (ex: "--end 3600")
+SUMO_EXTRA_ARGS = shlex.split(os.environ.get("SUMO_EXTRA_ARGS", ""))
+
+# Enregistrement des pas de simulation pour le mode replay
+SIMULATION_RECORD = False
+SIMULATION_RECORD_DIR = BASE_DIR / "recordings"
+
+# Sorties natives SUMO (tripinfo, summary, queue, fcd) : None = désactivées,
+# sinon un sous-dossier par lancement, lisible avec 'manage.py ingest_outputs'
+SIMULATION_OUTPUT_DIR = None
+
+# Nom du segment de mémoire partagée où chaque pas est publié, pour servir
+# '/data' depuis tous les workers (gunicorn/uvicorn) : None = désactivé
+SIMULATION_SHARED_SNAPSHOT = os.environ.get("SIMULATION_SHARED_SNAPSHOT")
+SIMULATION_SHARED_SNAPSHOT_SIZE = 4 * 1024 * 1024
+
+# Construction des variantes du réseau ('manage.py build_scenarios')
+NETCONVERT_BINARY = os.environ.get("NETCONVERT_BINARY", "netconvert")
+SCENARIO_NODES_FILE = "../carrefour4_netgenerate/nodes.nod.xml"
+SCENARIO_EDGES_FILE = "../carrefour4_netgenerate/edges.edg.xml"
+SCENARIO_CACHE_DIR = BASE_DIR / "scenario_cache"
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:4200",
 ]
\ No newline at end of file